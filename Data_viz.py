@@ -1,19 +1,19 @@
 # === 1. Import des librairies ===
-import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from cache_donnees import charger_donnees_brutes
+from pipeline_nettoyage import ETAPES_VENTES, executer_pipeline
+from pareto import AnalysePareto, revenus_par_produit
+
 # === 2. Chargement des données ===
-df = pd.read_excel("Online Retail.xlsx")  # adapter le chemin
+df = charger_donnees_brutes("Online Retail.xlsx")  # adapter le chemin
 
 # === 3. Nettoyage des données ===
-df = df.dropna(subset=["CustomerID"])  # enlever clients inconnus
-df = df[df["Quantity"] > 0]             # enlever retours
-df = df[df["UnitPrice"] > 0]            # enlever prix négatifs
-
-# Créer une colonne Chiffre d'Affaires
-df["Revenue"] = df["Quantity"] * df["UnitPrice"]
+# Clients connus, retours et prix négatifs exclus, puis colonne Chiffre d'Affaires
+df, rapport_nettoyage = executer_pipeline(df, ETAPES_VENTES)
+print(rapport_nettoyage.to_string(index=False))
 
 # === 4. KPI de base ===
 total_revenue = df["Revenue"].sum()
@@ -27,40 +27,48 @@ print("Nombre de clients : ", nb_customers)
 print("Panier moyen : ", round(avg_basket,2))
 
 # === 5. Loi de Pareto (80/20) ===
-pareto_df = df.groupby("Description")["Revenue"].sum().reset_index()
-pareto_df = pareto_df.sort_values("Revenue", ascending=False)
-pareto_df["cumperc"] = pareto_df["Revenue"].cumsum() / pareto_df["Revenue"].sum() * 100
+pareto = AnalysePareto(*revenus_par_produit(df))
+print(f"{pareto.nb_produits_pour(0.8)} produits sur {pareto.nb_produits} génèrent 80% du CA")
 
-# Graphique Pareto
+# Graphique Pareto : tout le catalogue en BUDGET_POINTS points au plus
+# (produits de tête un par un, traîne par classes de rangs, courbe simplifiée)
+barres_df, courbe_df = pareto.rendu()
 fig_pareto = go.Figure()
 
-# Barres (CA par produit)
+# Barres (CA par produit ; CA moyen par produit pour une classe de rangs)
 fig_pareto.add_trace(go.Bar(
-    x=pareto_df["Description"],
-    y=pareto_df["Revenue"],
+    x=barres_df["Rang"],
+    y=barres_df["Revenue"],
+    width=barres_df["Largeur"],
+    customdata=barres_df[["CA", "Nb produits"]],
+    hovertext=barres_df["Libelle"],
+    hovertemplate="%{hovertext}<br>CA : %{customdata[0]:,.0f} £ (%{customdata[1]} produit(s))<extra></extra>",
     name="CA par produit"
 ))
 
 # Courbe cumulée
 fig_pareto.add_trace(go.Scatter(
-    x=pareto_df["Description"],
-    y=pareto_df["cumperc"],
-    mode="lines+markers",
+    x=courbe_df["Rang"],
+    y=courbe_df["cumperc"],
+    hovertext=courbe_df["Description"],
+    mode="lines",
+    yaxis="y2",
     name="% cumulé"
 ))
 
 fig_pareto.update_layout(
     title="Analyse de Pareto - Produits (80/20)",
-    xaxis_title="Produits",
+    xaxis_title="Rang du produit",
     yaxis_title="Chiffre d'Affaires",
-    yaxis2=dict(title="% cumulé", overlaying="y", side="right"),
+    yaxis2=dict(title="% cumulé", overlaying="y", side="right", range=[0, 100]),
+    bargap=0,
     showlegend=True
 )
 
 fig_pareto.show()
 
 # === 6. CA par pays ===
-country_df = df.groupby("Country")["Revenue"].sum().reset_index()
+country_df = df.groupby("Country", observed=True)["Revenue"].sum().reset_index()
 country_df = country_df.sort_values("Revenue", ascending=False)
 
 fig_country = px.bar(
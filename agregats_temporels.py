@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+from typing import Hashable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cache_lru import CacheLRU
+from kpi import codes_entiers
+from temps import JOUR_NS
+
+# ===============================
+# Agrégats temporels des ventes
+# ===============================
+# Un seul passage sur les ventes filtrées, indexé par des codes entiers
+# (année, mois, jour de la semaine, heure) lus sur l'accesseur df.temps : lignes
+# et CA sont cumulés dans des tableaux denses (années x 12 x 7 x 24). Les mois
+# fructueux, les statistiques mensuelles et la saisonnalité sont des sommes sur
+# des axes de ces tableaux ; les libellés de mois et de jours ne sont ajoutés
+# qu'à l'affichage.
+#
+# Les comptes distincts ne s'additionnent pas entre cellules (une facture peut
+# avoir des lignes à deux heures différentes) : factures et clients distincts par
+# mois sont comptés directement sur les paires (mois, facture) et (mois, client).
+#
+# GrilleHoraire garde, elle, un tableau (jours x pays x 24 heures) construit une
+# fois au chargement : la vue jour de la semaine x heure d'une période et d'une
+# liste de pays est une somme de tranches de ce tableau, sans relire les ventes.
+
+FORME_CELLULES = (12, 7, 24)
+
+
+@dataclass
+class AgregatsTemporels:
+    annee_min: int
+    lignes: np.ndarray  # (années, mois, jour de la semaine, heure)
+    revenus: np.ndarray
+    commandes_par_mois: np.ndarray  # (années, mois)
+    clients_par_mois: np.ndarray  # (années, mois)
+
+    def par_mois(self) -> pd.DataFrame:
+        # Mois présents dans les ventes : CA, factures et clients distincts
+        annees, mois = np.nonzero(self.lignes.sum(axis=(2, 3)))
+        return pd.DataFrame({
+            "Year": annees + self.annee_min,
+            "Month": mois + 1,
+            "Revenue": self.revenus.sum(axis=(2, 3))[annees, mois],
+            "InvoiceNo": self.commandes_par_mois[annees, mois],
+            "CustomerID": self.clients_par_mois[annees, mois],
+        })
+
+    def par_jour_semaine(self) -> pd.DataFrame:
+        # Les 7 jours (0 = lundi), CA manquant pour un jour sans vente
+        revenus = self.revenus.sum(axis=(0, 1, 3))
+        return pd.DataFrame({
+            "DayOfWeek": np.arange(7),
+            "Revenue": np.where(self.lignes.sum(axis=(0, 1, 3)) > 0, revenus, np.nan),
+        })
+
+    def par_mois_calendaire(self) -> pd.DataFrame:
+        # Mois de l'année présents, toutes années confondues
+        mois = np.nonzero(self.lignes.sum(axis=(0, 2, 3)))[0]
+        return pd.DataFrame({"Month": mois + 1, "Revenue": self.revenus.sum(axis=(0, 2, 3))[mois]})
+
+
+def agreger_temps(ventes: pd.DataFrame, compter_clients: bool = True) -> AgregatsTemporels:
+    # compter_clients=False (mode approché) : clients comptés ailleurs, laissés à 0
+    if ventes.empty:
+        vide = np.zeros((0, *FORME_CELLULES))
+        return AgregatsTemporels(0, vide.astype(np.int64), vide, np.zeros((0, 12), np.int64),
+                                 np.zeros((0, 12), np.int64))
+
+    temps = ventes.temps
+    annees = temps.annee.astype(np.int64)
+    annee_min = int(annees.min())
+    nb_annees = int(annees.max()) - annee_min + 1
+    mois = (annees - annee_min) * 12 + temps.mois - 1
+    cellules = (mois * 7 + temps.jour_semaine) * 24 + temps.heure
+    taille = nb_annees * int(np.prod(FORME_CELLULES))
+
+    lignes = np.bincount(cellules, minlength=taille)
+    revenus = np.bincount(cellules, weights=ventes["Revenue"].to_numpy(dtype=np.float64), minlength=taille)
+
+    # Comptes distincts par mois sur des paires combinées en un seul entier
+    factures = codes_entiers(ventes["InvoiceNo"])
+    base = int(factures.max()) + 1
+    commandes_par_mois = np.bincount(np.unique(mois * base + factures) // base, minlength=nb_annees * 12)
+
+    if compter_clients:
+        clients = codes_entiers(ventes["CustomerID"])
+        connus = clients >= 0
+        base = int(clients.max()) + 1 if connus.any() else 1
+        paires = np.unique(mois[connus] * base + clients[connus])
+        clients_par_mois = np.bincount(paires // base, minlength=nb_annees * 12)
+    else:
+        clients_par_mois = np.zeros(nb_annees * 12, dtype=np.int64)
+
+    forme = (nb_annees, *FORME_CELLULES)
+    return AgregatsTemporels(
+        annee_min=annee_min,
+        lignes=lignes.reshape(forme),
+        revenus=revenus.reshape(forme),
+        commandes_par_mois=commandes_par_mois.reshape(nb_annees, 12),
+        clients_par_mois=clients_par_mois.reshape(nb_annees, 12),
+    )
+
+
+class ServiceTemporel:
+    def __init__(self, capacite: int = 32):
+        self._cache = CacheLRU(capacite)
+
+    def agregats(self, cle: Hashable, ventes: pd.DataFrame, compter_clients: bool = True) -> AgregatsTemporels:
+        # Un passage sur les ventes par état de filtre et par mode de comptage des clients
+        return self._cache.obtenir((cle, compter_clients), lambda: agreger_temps(ventes, compter_clients))
+
+
+# === Grille (jour x pays x heure) ===
+@dataclass
+class GrilleHoraire:
+    origine: int  # premier jour couvert (jours epoch)
+    pays: List[str]
+    revenus: np.ndarray  # (jours, pays, 24)
+    commandes: np.ndarray  # (jours, pays, 24), factures distinctes
+
+    @property
+    def nb_jours(self) -> int:
+        return self.revenus.shape[0]
+
+    def _jour(self, date) -> int:
+        return pd.Timestamp(date).value // JOUR_NS - self.origine
+
+    def semaine_heures(self, debut, fin, pays: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        # (CA, commandes) en tableaux 7 x 24 (0 = lundi) ; jours de début et de fin inclus
+        premier = int(np.clip(self._jour(debut), 0, self.nb_jours))
+        dernier = int(np.clip(self._jour(fin) + 1, premier, self.nb_jours))
+        positions = {p: i for i, p in enumerate(self.pays)}
+        colonnes = [positions[str(p)] for p in pays if str(p) in positions]
+        if len(colonnes) == len(self.pays):
+            colonnes = slice(None)
+
+        jours_semaine = (self.origine + np.arange(premier, dernier) + 3) % 7
+        resultats = []
+        for tableau in (self.revenus, self.commandes):
+            par_jour = tableau[premier:dernier][:, colonnes].sum(axis=1)
+            semaine = np.zeros((7, 24), dtype=par_jour.dtype)
+            np.add.at(semaine, jours_semaine, par_jour)
+            resultats.append(semaine)
+        return resultats[0], resultats[1]
+
+    def fusionner(self, autre: "GrilleHoraire") -> "GrilleHoraire":
+        # Grille couvrant les jours et les pays des deux grilles (lots ingérés)
+        if autre.nb_jours == 0:
+            return self
+        if self.nb_jours == 0:
+            return autre
+        origine = min(self.origine, autre.origine)
+        fin = max(self.origine + self.nb_jours, autre.origine + autre.nb_jours)
+        pays = sorted(set(self.pays) | set(autre.pays))
+        fusion = GrilleHoraire(origine, pays, np.zeros((fin - origine, len(pays), 24)),
+                               np.zeros((fin - origine, len(pays), 24), dtype=np.int32))
+        for grille in (self, autre):
+            jours = slice(grille.origine - origine, grille.origine - origine + grille.nb_jours)
+            colonnes = [pays.index(p) for p in grille.pays]
+            fusion.revenus[jours, colonnes] += grille.revenus
+            fusion.commandes[jours, colonnes] += grille.commandes
+        return fusion
+
+
+def construire_grille(ventes: pd.DataFrame) -> GrilleHoraire:
+    if ventes.empty:
+        return GrilleHoraire(0, [], np.zeros((0, 0, 24)), np.zeros((0, 0, 24), dtype=np.int32))
+    temps = ventes.temps
+    jours = temps.jours_epoch
+    origine = int(jours.min())
+    nb_jours = int(jours.max()) - origine + 1
+    codes_pays, pays = pd.factorize(ventes["Country"], sort=True)
+    cellules = ((jours - origine) * len(pays) + codes_pays) * 24 + temps.heure
+    taille = nb_jours * len(pays) * 24
+
+    revenus = np.bincount(cellules, weights=ventes["Revenue"].to_numpy(dtype=np.float64), minlength=taille)
+    factures = codes_entiers(ventes["InvoiceNo"])
+    base = int(factures.max()) + 1
+    commandes = np.bincount(np.unique(cellules * base + factures) // base, minlength=taille)
+
+    forme = (nb_jours, len(pays), 24)
+    return GrilleHoraire(origine, [str(p) for p in pays], revenus.reshape(forme),
+                         commandes.reshape(forme).astype(np.int32))
@@ -0,0 +1,246 @@
+import hashlib
+import html
+import importlib.util
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from sketches import HyperLogLog, SketchQuantiles, TopValeurs
+
+# ===============================
+# Audits avant / après nettoyage
+# ===============================
+# Un profil complet de ydata-profiling (corrélations, interactions) croît bien
+# plus vite que le nettoyage avec la taille du fichier. Le mode "rapide" profile
+# un échantillon de lignes de taille fixe, en mode minimal et sans corrélations :
+# la durée de l'audit ne dépend plus de la taille du fichier. Les deux audits
+# tournent dans des processus séparés ; un rapport déjà produit pour les mêmes
+# données (empreinte du contenu) et la même configuration est recopié du cache.
+# Au-delà de SEUIL_AUDIT_NATIF lignes (ou sans ydata-profiling), l'audit natif
+# résume chaque colonne en une passe par morceaux (manquants, distincts
+# HyperLogLog, min / max, quantiles, valeurs fréquentes) et compare les profils
+# avant / après dans un seul rapport.
+
+DOSSIER_RAPPORTS = ".cache_rapports"
+SEUIL_AUDIT_NATIF = 1_000_000  # lignes au-delà desquelles le mode auto choisit l'audit natif
+TAILLE_MORCEAU_AUDIT = 100_000
+NB_VALEURS_FREQUENTES = 3
+
+
+@dataclass(frozen=True)
+class ConfigAudit:
+    echantillon: Optional[int] = 50_000  # lignes profilées au plus (None : toutes)
+    minimal: bool = True
+    correlations: bool = False
+    graine: int = 0
+
+    def parametres(self) -> dict:
+        parametres = {"minimal": self.minimal, "explorative": not self.minimal}
+        if not self.correlations:
+            parametres["correlations"] = None
+            parametres["interactions"] = None
+        return parametres
+
+
+MODES_AUDIT: Dict[str, Optional[ConfigAudit]] = {
+    "complet": ConfigAudit(echantillon=None, minimal=False, correlations=True),
+    "rapide": ConfigAudit(),
+    "aucun": None,
+}
+
+
+def empreinte_donnees(df: pd.DataFrame) -> str:
+    sha = hashlib.sha256()
+    sha.update(repr([(str(col), str(df[col].dtype)) for col in df.columns]).encode())
+    sha.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def echantillonner(df: pd.DataFrame, config: ConfigAudit) -> pd.DataFrame:
+    if config.echantillon is None or len(df) <= config.echantillon:
+        return df
+    return df.sample(config.echantillon, random_state=config.graine).sort_index()
+
+
+def _generer_rapport(df: pd.DataFrame, titre: str, parametres: dict, sortie: str) -> str:
+    # Import dans le processus d'audit : seul l'audit dépend de ydata-profiling
+    from ydata_profiling import ProfileReport
+
+    ProfileReport(df, title=titre, **parametres).to_file(sortie)
+    return sortie
+
+
+def auditer(audits: List[Tuple[pd.DataFrame, str, str]], config: ConfigAudit,
+            dossier_cache: str = DOSSIER_RAPPORTS) -> List[str]:
+    # audits : (données, titre, fichier HTML) ; retourne les fichiers produits
+    os.makedirs(dossier_cache, exist_ok=True)
+    a_generer = []
+    for df, titre, sortie in audits:
+        echantillon = echantillonner(df, config)
+        if len(echantillon) < len(df):
+            titre = f"{titre} (échantillon de {len(echantillon)} lignes sur {len(df)})"
+        cle = hashlib.sha256(f"{empreinte_donnees(df)}|{config}|{titre}".encode()).hexdigest()
+        en_cache = os.path.join(dossier_cache, f"{cle[:24]}.html")
+        if os.path.exists(en_cache):
+            shutil.copyfile(en_cache, sortie)
+        else:
+            a_generer.append((echantillon, titre, sortie, en_cache))
+
+    if a_generer:
+        with ProcessPoolExecutor(max_workers=len(a_generer)) as executeur:
+            taches = [executeur.submit(_generer_rapport, echantillon, titre, config.parametres(), sortie)
+                      for echantillon, titre, sortie, _ in a_generer]
+            for tache, (_, _, sortie, en_cache) in zip(taches, a_generer):
+                tache.result()
+                shutil.copyfile(sortie, en_cache + ".tmp")
+                os.replace(en_cache + ".tmp", en_cache)
+    return [sortie for _, _, sortie in audits]
+
+
+def choisir_mode(nb_lignes: int) -> str:
+    # Mode "auto" : profil ydata-profiling rapide pour les fichiers modestes
+    if nb_lignes > SEUIL_AUDIT_NATIF or importlib.util.find_spec("ydata_profiling") is None:
+        return "natif"
+    return "rapide"
+
+
+# === Audit natif : profils en une passe par morceaux ===
+class ProfilColonne:
+    def __init__(self):
+        self.type = ""
+        self.manquants = 0
+        self.distincts = HyperLogLog()
+        self.frequentes = TopValeurs()
+        self.quantiles: Optional[SketchQuantiles] = None
+        self.minimum = None
+        self.maximum = None
+
+    def ajouter(self, colonne: pd.Series) -> None:
+        self.type = str(colonne.dtype)
+        valeurs = colonne.dropna()
+        self.manquants += len(colonne) - len(valeurs)
+        if valeurs.empty:
+            return
+        self.distincts.ajouter(pd.util.hash_pandas_object(valeurs, index=False).to_numpy())
+        comptes = valeurs.value_counts(sort=False)
+        comptes = comptes[comptes.to_numpy() > 0]  # catégories absentes du morceau
+        self.frequentes.ajouter(comptes.index, comptes.to_numpy())
+
+        numerique = pd.api.types.is_numeric_dtype(valeurs) and not pd.api.types.is_bool_dtype(valeurs)
+        if numerique or pd.api.types.is_datetime64_any_dtype(valeurs):
+            bas, haut = valeurs.min(), valeurs.max()
+            self.minimum = bas if self.minimum is None else min(self.minimum, bas)
+            self.maximum = haut if self.maximum is None else max(self.maximum, haut)
+        if numerique:
+            if self.quantiles is None:
+                self.quantiles = SketchQuantiles()
+            self.quantiles.ajouter(valeurs.to_numpy(dtype=float))
+
+    def resume(self, lignes: int) -> dict:
+        q1, mediane, q3 = (self.quantiles.quantiles([0.25, 0.5, 0.75]) if self.quantiles is not None
+                           else (None, None, None))
+        return {
+            "Type": self.type,
+            "Manquants": self.manquants,
+            "% manquants": round(100 * self.manquants / lignes, 2) if lignes else 0.0,
+            "Distincts (≈)": round(self.distincts.estimation()),
+            "Min": self.minimum,
+            "Q1 (≈)": q1,
+            "Médiane (≈)": mediane,
+            "Q3 (≈)": q3,
+            "Max": self.maximum,
+            "Valeurs fréquentes": ", ".join(
+                f"{valeur} ({nombre})" for valeur, nombre in self.frequentes.plus_frequentes(NB_VALEURS_FREQUENTES)
+            ),
+        }
+
+
+class ProfilDonnees:
+    def __init__(self):
+        self.lignes = 0
+        self.lignes_distinctes = HyperLogLog()
+        self.colonnes: Dict[str, ProfilColonne] = {}
+
+    def ajouter(self, morceau: pd.DataFrame) -> None:
+        self.lignes += len(morceau)
+        if len(morceau):
+            self.lignes_distinctes.ajouter(pd.util.hash_pandas_object(morceau, index=False).to_numpy())
+        for col in morceau.columns:
+            self.colonnes.setdefault(str(col), ProfilColonne()).ajouter(morceau[col])
+
+    def suivre(self, morceaux: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        # Profil calculé au passage des morceaux (mode flux)
+        for morceau in morceaux:
+            self.ajouter(morceau)
+            yield morceau
+
+    def tableau(self) -> pd.DataFrame:
+        return pd.DataFrame.from_dict(
+            {col: profil.resume(self.lignes) for col, profil in self.colonnes.items()}, orient="index"
+        ).rename_axis("Colonne").reset_index()
+
+
+def profiler(df: pd.DataFrame, taille_morceau: int = TAILLE_MORCEAU_AUDIT) -> ProfilDonnees:
+    profil = ProfilDonnees()
+    for debut in range(0, len(df), taille_morceau):
+        profil.ajouter(df.iloc[debut:debut + taille_morceau])
+    return profil
+
+
+def comparer_profils(avant: ProfilDonnees, apres: ProfilDonnees) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Ce que le nettoyage a changé : lignes, puis colonne par colonne (nettoyer_donnees
+    # garde l'ordre des colonnes et ne fait que les renommer)
+    synthese = pd.DataFrame([
+        ("Lignes", avant.lignes, apres.lignes),
+        ("Lignes distinctes (≈)", round(avant.lignes_distinctes.estimation()),
+         round(apres.lignes_distinctes.estimation())),
+        ("Doublons retirés", "", avant.lignes - apres.lignes),
+        ("Valeurs manquantes", sum(p.manquants for p in avant.colonnes.values()),
+         sum(p.manquants for p in apres.colonnes.values())),
+    ], columns=["Mesure", "Avant", "Après"])
+
+    lignes = []
+    for (nom_avant, p_avant), (nom_apres, p_apres) in zip(avant.colonnes.items(), apres.colonnes.items()):
+        lignes.append({
+            "Colonne": nom_avant if nom_avant == nom_apres else f"{nom_avant} → {nom_apres}",
+            "Type": p_avant.type if p_avant.type == p_apres.type else f"{p_avant.type} → {p_apres.type}",
+            "Manquants avant": p_avant.manquants,
+            "Manquants après": p_apres.manquants,
+            "Retirés ou complétés": p_avant.manquants - p_apres.manquants,
+            "Distincts avant (≈)": round(p_avant.distincts.estimation()),
+            "Distincts après (≈)": round(p_apres.distincts.estimation()),
+        })
+    return synthese, pd.DataFrame(lignes)
+
+
+def ecrire_rapport_natif(avant: ProfilDonnees, apres: ProfilDonnees, sortie: str,
+                         titre: str = "Audit du nettoyage") -> str:
+    synthese, colonnes = comparer_profils(avant, apres)
+    erreur = 100 * avant.lignes_distinctes.erreur_relative
+    sections = [
+        ("Synthèse", synthese),
+        ("Modifications par colonne", colonnes),
+        ("Profil AVANT nettoyage", avant.tableau()),
+        ("Profil APRES nettoyage", apres.tableau()),
+    ]
+    corps = "".join(
+        f"<h2>{html.escape(nom)}</h2>"
+        + tableau.astype(object).where(tableau.notna(), "").to_html(index=False, border=0)
+        for nom, tableau in sections
+    )
+    page = (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(titre)}</title>"
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;font-size:13px}"
+        "th,td{padding:4px 8px;border-bottom:1px solid #ddd;text-align:right}</style></head><body>"
+        f"<h1>{html.escape(titre)}</h1>"
+        f"<p>(≈) : distincts estimés par HyperLogLog (erreur typique {erreur:.1f} %), "
+        "quantiles à 1 % près.</p>"
+        f"{corps}</body></html>"
+    )
+    with open(sortie, "w", encoding="utf-8") as f:
+        f.write(page)
+    return sortie
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow.feather as feather
+
+# ===============================
+# Cache colonnaire du fichier Online Retail
+# ===============================
+# La lecture de "Online Retail.xlsx" via openpyxl prend plusieurs dizaines de
+# secondes. Le classeur est converti une seule fois en fichier Feather (Arrow IPC
+# non compressé, donc projetable en mémoire), identifié par la date de
+# modification et l'empreinte SHA-256 du fichier source.
+
+FICHIER_SOURCE = "Online Retail.xlsx"
+DOSSIER_CACHE = ".cache_donnees"
+
+COLONNES_CATEGORIELLES = ["Country", "Description", "StockCode"]
+COLONNES_TEXTE = ["InvoiceNo", "StockCode"]
+
+
+def empreinte_fichier(fichier: str, taille_bloc: int = 1 << 20) -> str:
+    sha = hashlib.sha256()
+    with open(fichier, "rb") as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b""):
+            sha.update(bloc)
+    return sha.hexdigest()
+
+
+def typer_colonnes(df: pd.DataFrame) -> pd.DataFrame:
+    # InvoiceNo et StockCode mélangent entiers et chaînes dans l'Excel ("C536379", 85123)
+    for col in COLONNES_TEXTE:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    for col in COLONNES_CATEGORIELLES:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _chemin_meta(fichier: str, dossier_cache: str) -> str:
+    nom = os.path.splitext(os.path.basename(fichier))[0].replace(" ", "_")
+    return os.path.join(dossier_cache, f"{nom}.json")
+
+
+def _lire_meta(chemin_meta: str) -> dict:
+    try:
+        with open(chemin_meta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _ecrire_meta(chemin_meta: str, meta: dict) -> None:
+    tmp = chemin_meta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, chemin_meta)
+
+
+def _lire_cache(chemin_cache: str) -> pd.DataFrame:
+    return feather.read_table(chemin_cache, memory_map=True).to_pandas()
+
+
+def construire_cache(fichier: str, chemin_cache: str) -> pd.DataFrame:
+    df = typer_colonnes(pd.read_excel(fichier))
+    tmp = chemin_cache + ".tmp"
+    # Non compressé : le fichier peut ensuite être projeté en mémoire (memory_map)
+    df.reset_index(drop=True).to_feather(tmp, compression="uncompressed")
+    os.replace(tmp, chemin_cache)
+    return df
+
+
+# Empreinte enregistrée au dernier chargement, recalculée si le fichier a changé depuis
+def empreinte_source(fichier: str = FICHIER_SOURCE, dossier_cache: str = DOSSIER_CACHE) -> str:
+    meta = _lire_meta(_chemin_meta(fichier, dossier_cache))
+    stat = os.stat(fichier)
+    if "sha256" in meta and meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("taille") == stat.st_size:
+        return meta["sha256"]
+    return empreinte_fichier(fichier)
+
+
+# Retourne le dataset brut, en ne relisant l'Excel que si la source a changé
+def charger_donnees_brutes(fichier: str = FICHIER_SOURCE, dossier_cache: str = DOSSIER_CACHE) -> pd.DataFrame:
+    os.makedirs(dossier_cache, exist_ok=True)
+    chemin_meta = _chemin_meta(fichier, dossier_cache)
+    meta = _lire_meta(chemin_meta)
+
+    stat = os.stat(fichier)
+    chemin_cache = meta.get("cache")
+    cache_valide = chemin_cache is not None and os.path.exists(chemin_cache)
+
+    # Date de modification et taille identiques : pas besoin de recalculer l'empreinte
+    if cache_valide and meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("taille") == stat.st_size:
+        return _lire_cache(chemin_cache)
+
+    empreinte = empreinte_fichier(fichier)
+    if cache_valide and meta.get("sha256") == empreinte:
+        df = _lire_cache(chemin_cache)
+    else:
+        nom = os.path.splitext(os.path.basename(chemin_meta))[0]
+        nouveau_cache = os.path.join(dossier_cache, f"{nom}_{empreinte[:12]}.feather")
+        df = construire_cache(fichier, nouveau_cache)
+        if cache_valide and chemin_cache != nouveau_cache:
+            os.remove(chemin_cache)
+        chemin_cache = nouveau_cache
+
+    _ecrire_meta(chemin_meta, {
+        "source": os.path.abspath(fichier),
+        "mtime_ns": stat.st_mtime_ns,
+        "taille": stat.st_size,
+        "sha256": empreinte,
+        "cache": chemin_cache,
+    })
+    return df
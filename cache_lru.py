@@ -0,0 +1,34 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable
+
+# ===============================
+# Cache LRU par état de filtre
+# ===============================
+# Résultats indexés par une clé (plage de dates, pays...) ; les entrées les moins
+# récemment utilisées sont évincées au-delà de la capacité.
+
+
+class CacheLRU:
+    def __init__(self, capacite: int = 32):
+        self.capacite = capacite
+        self._entrees = OrderedDict()
+        self._verrou = Lock()
+
+    def obtenir(self, cle: Hashable, calcul: Callable):
+        with self._verrou:
+            if cle in self._entrees:
+                self._entrees.move_to_end(cle)
+                return self._entrees[cle]
+
+        valeur = calcul()
+
+        with self._verrou:
+            self._entrees[cle] = valeur
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.capacite:
+                self._entrees.popitem(last=False)
+        return valeur
+
+    def __len__(self) -> int:
+        return len(self._entrees)
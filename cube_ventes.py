@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from agregats_temporels import GrilleHoraire, construire_grille
+from index_temporel import IndexTemporel
+from pipeline_nettoyage import concatener_lignes
+from sketches import HyperLogLog, estimations_hyperloglog, registres_par_groupe
+from temps import JOUR_NS, civil_depuis_jours, jours_depuis_civil
+
+# ===============================
+# Cube OLAP des ventes
+# ===============================
+# Agrégats construits une seule fois au chargement, aux grains
+# (jour x pays x produit), (jour x pays x client) et (jour x pays). Les filtres
+# de la barre latérale découpent ces cubes au lieu de relire les lignes de
+# transactions ; les séries par semaine, mois, trimestre ou année sont cumulées
+# à partir du grain (jour x pays). La grille (jour x pays x heure) sert la vue
+# jour de la semaine x heure.
+#
+# Une facture n'a qu'un client, un pays et une date : le nombre de factures
+# distinctes d'une cellule (jour, pays, client) peut donc être additionné entre
+# cellules sans double comptage.
+#
+# Les clients distincts ne s'additionnent pas : chaque ligne du cumul quotidien
+# (jour, pays) porte aussi un sketch HyperLogLog de ses clients. Le mode approché
+# du tableau de bord fusionne (maximum registre par registre) les sketches des
+# lignes filtrées, pour toute la sélection ou mois par mois, sans relire les
+# ventes ; le mode exact reste celui par défaut.
+
+BITS_CLIENTS = 10  # 1 024 registres d'un octet par (jour, pays), erreur typique 3,3 %
+
+
+@dataclass
+class CubeVentes:
+    produits: pd.DataFrame
+    clients: pd.DataFrame
+    jours: Optional[pd.DataFrame] = None
+    index_produits: Optional[IndexTemporel] = None
+    index_clients: Optional[IndexTemporel] = None
+    index_jours: Optional[IndexTemporel] = None
+    heures: Optional[GrilleHoraire] = None
+    sketches_clients: Optional[np.ndarray] = None  # (lignes de jours, 2^BITS_CLIENTS)
+
+
+def construire_cube(ventes: pd.DataFrame) -> CubeVentes:
+    jour = ventes["InvoiceDate"].dt.normalize().rename("Jour")
+
+    produits = (ventes.groupby([jour, "Country", "Description"], observed=True)
+                      .agg(Revenue=("Revenue", "sum"), Quantity=("Quantity", "sum"))
+                      .reset_index())
+
+    clients = (ventes.groupby([jour, "Country", "CustomerID"], observed=True)
+                     .agg(Revenue=("Revenue", "sum"), Commandes=("InvoiceNo", "nunique"))
+                     .reset_index())
+
+    # Cumul quotidien par pays, à partir des cellules clients (factures additives)
+    jours = (clients.groupby(["Jour", "Country"], observed=True)[["Revenue", "Commandes"]]
+                    .sum().reset_index())
+
+    # Une cellule clients = un client distinct de sa ligne (jour, pays) ; ngroup suit
+    # l'ordre trié du groupby, donc celui des lignes de jours
+    sketches_clients = registres_par_groupe(
+        clients.groupby(["Jour", "Country"], observed=True).ngroup().to_numpy(),
+        pd.util.hash_pandas_object(clients["CustomerID"], index=False).to_numpy(),
+        len(jours), BITS_CLIENTS,
+    )
+
+    # Le groupby trie sur Jour en premier : les trois tables sont déjà chronologiques
+    return CubeVentes(
+        produits=produits,
+        clients=clients,
+        jours=jours,
+        index_produits=IndexTemporel(produits, colonne_date="Jour"),
+        index_clients=IndexTemporel(clients, colonne_date="Jour"),
+        index_jours=IndexTemporel(jours, colonne_date="Jour"),
+        heures=construire_grille(ventes),
+        sketches_clients=sketches_clients,
+    )
+
+
+def etendre_cube(cube: CubeVentes, ventes: pd.DataFrame) -> None:
+    # Ventes d'un lot ingéré : ses cellules sont ajoutées au cube puis regroupées
+    # avec les cellules existantes de mêmes clés (mêmes jours en cas de recouvrement)
+    lot = construire_cube(ventes)
+    cube.produits = _regrouper(cube.produits, lot.produits, ["Description"],
+                               {"Revenue": "sum", "Quantity": "sum"})
+    cube.clients = _regrouper(cube.clients, lot.clients, ["CustomerID"],
+                              {"Revenue": "sum", "Commandes": "sum"})
+    # Sketches des lignes (jour, pays) communes fusionnés, dans l'ordre du regroupement
+    groupes = (concatener_lignes([cube.jours, lot.jours])
+               .groupby(["Jour", "Country"], observed=True).ngroup().to_numpy())
+    cube.jours = _regrouper(cube.jours, lot.jours, [], {"Revenue": "sum", "Commandes": "sum"})
+    sketches = np.zeros((len(cube.jours), 1 << BITS_CLIENTS), dtype=np.uint8)
+    np.maximum.at(sketches, groupes, np.concatenate([cube.sketches_clients, lot.sketches_clients]))
+    cube.sketches_clients = sketches
+    cube.index_produits = IndexTemporel(cube.produits, colonne_date="Jour")
+    cube.index_clients = IndexTemporel(cube.clients, colonne_date="Jour")
+    cube.index_jours = IndexTemporel(cube.jours, colonne_date="Jour")
+    cube.heures = cube.heures.fusionner(lot.heures)
+
+
+def _regrouper(cellules: pd.DataFrame, nouvelles: pd.DataFrame, cles: List[str], agregats: dict) -> pd.DataFrame:
+    return (concatener_lignes([cellules, nouvelles])
+            .groupby(["Jour", "Country", *cles], observed=True).agg(agregats).reset_index())
+
+
+def filtrer_cube(cube: CubeVentes, debut, fin, pays: List[str]) -> CubeVentes:
+    return CubeVentes(
+        produits=cube.index_produits.filtrer(cube.produits, debut, fin, pays),
+        clients=cube.index_clients.filtrer(cube.clients, debut, fin, pays),
+        jours=cube.index_jours.filtrer(cube.jours, debut, fin, pays),
+    )
+
+
+# === Lectures du cube ===
+def clients_approches(cube: CubeVentes, debut, fin, pays: List[str]) -> HyperLogLog:
+    # Sketch des clients de la période et des pays : fusion des lignes (jour, pays)
+    registres = cube.sketches_clients[cube.index_jours.positions(debut, fin, pays)]
+    if len(registres):
+        return HyperLogLog(BITS_CLIENTS, registres.max(axis=0))
+    return HyperLogLog(BITS_CLIENTS)
+
+
+def clients_approches_par_mois(cube: CubeVentes, debut, fin, pays: List[str]) -> pd.DataFrame:
+    # Clients distincts estimés par (année, mois) : fusion des sketches des lignes
+    # (jour, pays) de chaque mois, mêmes colonnes que AgregatsTemporels.par_mois
+    positions = cube.index_jours.positions(debut, fin, pays)
+    jours = cube.jours["Jour"].to_numpy().astype("datetime64[ns]").view(np.int64)[positions] // JOUR_NS
+    annee, mois, _ = civil_depuis_jours(jours)
+    cles, groupes = np.unique(annee * 12 + mois - 1, return_inverse=True)
+    registres = np.zeros((len(cles), 1 << BITS_CLIENTS), dtype=np.uint8)
+    np.maximum.at(registres, groupes, cube.sketches_clients[positions])
+    return pd.DataFrame({
+        "Year": cles // 12,
+        "Month": cles % 12 + 1,
+        "CustomerID": np.rint(estimations_hyperloglog(registres)).astype(np.int64),
+    })
+
+
+def ca_par_pays(cube: CubeVentes) -> pd.DataFrame:
+    country_revenue = cube.clients.groupby("Country", observed=True)["Revenue"].sum().reset_index()
+    return country_revenue.sort_values("Revenue", ascending=False)
+
+
+def top_produits_par_pays(lignes: pd.DataFrame, n: int = 10) -> Dict[str, pd.DataFrame]:
+    # Une seule agrégation (pays, produit) pour tous les pays, puis top-n par pays
+    ca = lignes.groupby(["Country", "Description"], observed=True)["Revenue"].sum().reset_index()
+    ca = ca.sort_values(["Country", "Revenue"], ascending=[True, False], kind="stable")
+    top = ca.groupby("Country", observed=True).head(n)
+    return {
+        str(pays): table[["Description", "Revenue"]].reset_index(drop=True)
+        for pays, table in top.groupby("Country", observed=True)
+    }
+
+
+# === Séries temporelles dérivées du cumul quotidien ===
+PERIODES = ("Hebdomadaire", "Mensuel", "Trimestriel", "Annuel")
+
+
+def fin_de_periode(jours: np.ndarray, periode: str) -> np.ndarray:
+    # Dernier jour (jours epoch) de la période de chaque jour : dimanche, fin de
+    # mois, de trimestre ou d'année, comme les libellés de resample
+    if periode == "Hebdomadaire":
+        return jours + 6 - (jours + 3) % 7
+    annee, mois, _ = civil_depuis_jours(jours)
+    if periode == "Trimestriel":
+        mois = (mois - 1) // 3 * 3 + 3
+    elif periode == "Annuel":
+        mois = np.full_like(mois, 12)
+    # Veille du premier jour du mois suivant
+    return jours_depuis_civil(annee + (mois == 12), mois % 12 + 1, np.ones_like(mois)) - 1
+
+
+def serie_par_periode(jours: pd.DataFrame, periode: str) -> pd.DataFrame:
+    # CA et commandes par période, périodes vides comprises entre la première et la dernière
+    if jours.empty:
+        return pd.DataFrame({"Date": pd.to_datetime([]), "Revenue": [], "Commandes": []})
+    jours_epoch = jours["Jour"].to_numpy().astype("datetime64[ns]").view(np.int64) // JOUR_NS
+    fins = fin_de_periode(jours_epoch, periode)
+    toutes = np.unique(fin_de_periode(np.arange(jours_epoch.min(), jours_epoch.max() + 1), periode))
+    positions = np.searchsorted(toutes, fins)
+    return pd.DataFrame({
+        "Date": toutes.astype("datetime64[D]").astype("datetime64[ns]"),
+        "Revenue": np.bincount(positions, weights=jours["Revenue"].to_numpy(dtype=np.float64),
+                               minlength=len(toutes)),
+        "Commandes": np.bincount(positions, weights=jours["Commandes"].to_numpy(dtype=np.float64),
+                                 minlength=len(toutes)).astype(np.int64),
+    })
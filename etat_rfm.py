@@ -0,0 +1,171 @@
+import json
+import os
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from rfm import NB_QUARTILES, attribuer_scores
+from temps import JOUR_NS
+
+# ===============================
+# État RFM incrémental
+# ===============================
+# Par client : instant du dernier achat, nombre de factures, somme du CA. Un lot
+# de nouvelles transactions est fusionné en O(lot) : seuls ses clients sont
+# relus et mis à jour. Les scores sont ensuite ceux de rfm.calculer_rfm (même
+# date de référence, quartiles exacts sur les clients), sans relire les ventes.
+# L'état enregistre l'empreinte des règles de nettoyage et la liste ordonnée des
+# sources fusionnées (fichier source, ou lots de l'entrepôt). Il est reconstruit
+# quand les règles changent, quand une source déjà fusionnée a changé, ou quand
+# un nouveau lot contient des lignes antérieures à l'horizon (factures tardives
+# ou rattrapage) : une facture n'est jamais comptée deux fois ni ignorée.
+
+DOSSIER_ETAT = ".etat_rfm"
+SANS_ACHAT = int(np.iinfo(np.int64).min)
+
+
+class EtatRFM:
+    def __init__(self, version: str = "", sources: List[str] = None):
+        self.version = version
+        self.sources = list(sources or [])
+        self.nb_clients = 0
+        self.clients = np.empty(0, dtype=np.int64)
+        self.dernier_achat = np.empty(0, dtype=np.int64)
+        self.frequence = np.empty(0, dtype=np.int64)
+        self.montant = np.empty(0, dtype=np.float64)
+        self.positions: Dict[int, int] = {}
+        self.horizon = SANS_ACHAT
+        self._scores = None  # tableau de scores, valable jusqu'au prochain fusionner
+
+    def _reserver(self, taille: int) -> None:
+        # Capacité doublée au besoin : l'ajout de clients reste amorti en O(lot)
+        if taille <= len(self.clients):
+            return
+        capacite = max(taille, 2 * len(self.clients), 1024)
+        for nom in ["clients", "dernier_achat", "frequence", "montant"]:
+            ancien = getattr(self, nom)
+            nouveau = np.zeros(capacite, dtype=ancien.dtype)
+            nouveau[:self.nb_clients] = ancien[:self.nb_clients]
+            setattr(self, nom, nouveau)
+
+    def _positions_clients(self, clients: np.ndarray) -> np.ndarray:
+        positions = np.array([self.positions.get(c, -1) for c in clients.tolist()], dtype=np.int64)
+        nouveaux = np.flatnonzero(positions < 0)
+        if len(nouveaux):
+            self._reserver(self.nb_clients + len(nouveaux))
+            positions[nouveaux] = np.arange(self.nb_clients, self.nb_clients + len(nouveaux))
+            self.clients[positions[nouveaux]] = clients[nouveaux]
+            self.dernier_achat[positions[nouveaux]] = SANS_ACHAT
+            self.positions.update(zip(clients[nouveaux].tolist(), positions[nouveaux].tolist()))
+            self.nb_clients += len(nouveaux)
+        return positions
+
+    def est_tardif(self, lot: pd.DataFrame) -> bool:
+        # Lignes à ou avant l'horizon : une facture déjà fusionnée pourrait être recomptée
+        return self.nb_clients > 0 and len(lot) > 0 and int(lot.temps.instants.min()) <= self.horizon
+
+    def fusionner(self, lot: pd.DataFrame) -> int:
+        # Toutes les lignes du lot sont fusionnées : l'appelant vérifie est_tardif
+        connus = lot["CustomerID"].notna().to_numpy()
+        if not connus.any():
+            return 0
+        lot = lot[connus]
+        instants = lot.temps.instants
+        self._scores = None
+
+        # Agrégats du lot par client (une facture n'a qu'un client)
+        par_client = pd.DataFrame({
+            "Instant": instants,
+            "Facture": lot["InvoiceNo"].to_numpy(),
+            "Revenue": lot["Revenue"].to_numpy(dtype=np.float64),
+        }).groupby(lot["CustomerID"].to_numpy(dtype=np.int64), sort=False).agg(
+            {"Instant": "max", "Facture": "nunique", "Revenue": "sum"})
+
+        positions = self._positions_clients(par_client.index.to_numpy())
+        self.dernier_achat[positions] = np.maximum(self.dernier_achat[positions], par_client["Instant"].to_numpy())
+        self.frequence[positions] += par_client["Facture"].to_numpy()
+        self.montant[positions] += par_client["Revenue"].to_numpy()
+        self.horizon = max(self.horizon, int(instants.max()))
+        return len(lot)
+
+    def scores(self) -> pd.DataFrame:
+        # Même tableau que rfm.calculer_rfm sur toutes les ventes fusionnées,
+        # calculé une fois par état (partagé, en lecture seule)
+        if self._scores is None:
+            self._scores = self._calculer_scores()
+        return self._scores
+
+    def _calculer_scores(self) -> pd.DataFrame:
+        n = self.nb_clients
+        ordre = np.argsort(self.clients[:n], kind="stable")
+        # Date de référence : lendemain de la dernière transaction, récence en jours entiers
+        reference = self.horizon + JOUR_NS
+        rfm = pd.DataFrame({
+            "Recency": (reference - self.dernier_achat[:n][ordre]) // JOUR_NS,
+            "Frequency": self.frequence[:n][ordre],
+            "Monetary": self.montant[:n][ordre],
+        }, index=pd.Index(self.clients[:n][ordre], name="CustomerID"))
+        if n >= NB_QUARTILES:
+            attribuer_scores(rfm)
+        return rfm
+
+    # === Persistance (Feather pour les clients, JSON pour l'horizon et les sources) ===
+    def sauvegarder(self, dossier: str = DOSSIER_ETAT) -> None:
+        os.makedirs(dossier, exist_ok=True)
+        n = self.nb_clients
+        chemin = os.path.join(dossier, "clients.feather")
+        pd.DataFrame({
+            "CustomerID": self.clients[:n],
+            "DernierAchat": self.dernier_achat[:n],
+            "Frequency": self.frequence[:n],
+            "Monetary": self.montant[:n],
+        }).to_feather(chemin + ".tmp", compression="uncompressed")
+        os.replace(chemin + ".tmp", chemin)
+
+        chemin = os.path.join(dossier, "etat.json")
+        with open(chemin + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"horizon": self.horizon, "version": self.version, "sources": self.sources}, f)
+        os.replace(chemin + ".tmp", chemin)
+
+    @classmethod
+    def charger(cls, dossier: str = DOSSIER_ETAT) -> "EtatRFM":
+        try:
+            with open(os.path.join(dossier, "etat.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            clients = feather.read_table(os.path.join(dossier, "clients.feather")).to_pandas()
+        except (OSError, ValueError):
+            return cls()
+
+        etat = cls(meta["version"], meta["sources"])
+        etat.nb_clients = len(clients)
+        etat.clients = clients["CustomerID"].to_numpy(dtype=np.int64).copy()
+        etat.dernier_achat = clients["DernierAchat"].to_numpy(dtype=np.int64).copy()
+        etat.frequence = clients["Frequency"].to_numpy(dtype=np.int64).copy()
+        etat.montant = clients["Monetary"].to_numpy(dtype=np.float64).copy()
+        etat.positions = dict(zip(etat.clients.tolist(), range(etat.nb_clients)))
+        etat.horizon = meta["horizon"]
+        return etat
+
+
+# Charge l'état enregistré et n'y fusionne que les sources qu'il n'a pas encore vues.
+# sources : identifiants ordonnés des données (empreinte du fichier source, ou des
+# lots de l'entrepôt) ; ventes_depuis(i) : ventes des sources d'indice >= i
+def mettre_a_jour_etat_rfm(sources: List[str], ventes_depuis: Callable[[int], pd.DataFrame],
+                           version: str, dossier: str = DOSSIER_ETAT) -> EtatRFM:
+    etat = EtatRFM.charger(dossier)
+    deja = len(etat.sources)
+    if etat.version != version or etat.sources != sources[:deja]:
+        # Règles de nettoyage ou source déjà fusionnée modifiées : reconstruction
+        etat, deja = EtatRFM(version), 0
+    if deja == len(sources):
+        return etat
+
+    ventes = ventes_depuis(deja)
+    if etat.est_tardif(ventes):
+        etat, ventes = EtatRFM(version), ventes_depuis(0)
+    etat.fusionner(ventes)
+    etat.sources = list(sources)
+    etat.sauvegarder(dossier)
+    return etat
@@ -0,0 +1,49 @@
+from threading import Lock
+from typing import List, Optional
+
+from cube_ventes import CubeVentes, construire_cube, etendre_cube
+from index_temporel import IndexTemporel
+from ingestion import Entrepot
+from partitions import PartitionsTransactions, partitionner
+
+# ===============================
+# Fenêtre de données (période x pays) lue dans l'entrepôt
+# ===============================
+# Seules les partitions mensuelles qui recoupent la période et les pays sont
+# lues, puis réduites aux lignes de la fenêtre : la mémoire et le temps de
+# chargement suivent la fenêtre sélectionnée, pas la taille de l'historique.
+# Quand de nouveaux lots arrivent, la fenêtre ne lit que leurs partitions et les
+# ajoute à ses partitions et à son cube.
+
+
+class FenetreDonnees:
+    def __init__(self, entrepot: Entrepot, debut, fin, pays: List[str]):
+        self.entrepot = entrepot
+        self.debut = debut
+        self.fin = fin
+        self.pays = list(pays)
+        self.version = 0
+        self.partitions: Optional[PartitionsTransactions] = None
+        self.cube: Optional[CubeVentes] = None
+        self._verrou = Lock()
+
+    def actualiser(self) -> "FenetreDonnees":
+        with self._verrou:
+            # Lots depuis_lot + 1 à version exactement : un lot validé pendant la
+            # lecture sera lu à la prochaine actualisation, et une seule fois
+            version = self.entrepot.version()
+            if version == self.version:
+                return self
+            lignes = self.entrepot.charger(self.debut, self.fin, self.pays,
+                                           depuis_lot=self.version, jusqu_au_lot=version)
+            if not lignes.empty:
+                lignes = IndexTemporel(lignes).filtrer(lignes, self.debut, self.fin, self.pays)
+                lot = partitionner(lignes.reset_index(drop=True))
+                if self.partitions is None:
+                    self.partitions = lot
+                    self.cube = construire_cube(lot.ventes.lignes)
+                else:
+                    self.partitions.ajouter(lot)
+                    etendre_cube(self.cube, lot.ventes.lignes)
+            self.version = version
+            return self
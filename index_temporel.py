@@ -0,0 +1,73 @@
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+# ===============================
+# Index temporel et index par pays
+# ===============================
+# Le tableau indexé doit être trié par date. Une plage de dates devient alors
+# une tranche contiguë de lignes (vue, sans copie) trouvée par recherche
+# dichotomique, et le filtre pays se limite aux positions du pays comprises
+# dans cette tranche.
+
+JOUR_NS = 86_400 * 10**9
+
+
+def trier_par_date(df: pd.DataFrame, colonne_date: str = "InvoiceDate") -> pd.DataFrame:
+    return df.sort_values(colonne_date, kind="stable", ignore_index=True)
+
+
+class IndexTemporel:
+    def __init__(self, df: pd.DataFrame, colonne_date: str = "InvoiceDate", colonne_pays: str = "Country"):
+        instants = df[colonne_date].to_numpy().astype("datetime64[ns]").view("int64")
+        if len(instants) > 1 and np.any(np.diff(instants) < 0):
+            raise ValueError(f"Le tableau doit être trié par {colonne_date}")
+
+        self.nb_lignes = len(instants)
+        self.origine = (instants[0] // JOUR_NS) * JOUR_NS if len(instants) else 0
+
+        # debut_jour[k] = première ligne du k-ième jour depuis l'origine
+        jours = (instants - self.origine) // JOUR_NS
+        nb_jours = int(jours[-1]) + 1 if len(jours) else 0
+        self.debut_jour = np.searchsorted(jours, np.arange(nb_jours + 1), side="left")
+
+        # Positions (croissantes) des lignes de chaque pays
+        codes, pays = pd.factorize(df[colonne_pays], sort=True)
+        ordre = np.argsort(codes, kind="stable")[np.count_nonzero(codes < 0):]
+        bornes = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(pays)))[:-1]
+        self.positions_pays: Dict[str, np.ndarray] = {
+            str(p): positions for p, positions in zip(pays, np.split(ordre, bornes))
+        }
+
+    def _indice_jour(self, date) -> int:
+        decalage = (pd.Timestamp(date).value - self.origine) // JOUR_NS
+        return int(np.clip(decalage, 0, len(self.debut_jour) - 1))
+
+    def tranche(self, debut, fin) -> slice:
+        # Jours de début et de fin inclus
+        premier = self.debut_jour[self._indice_jour(debut)]
+        dernier = self.debut_jour[self._indice_jour(pd.Timestamp(fin) + pd.Timedelta(days=1))]
+        return slice(int(premier), int(max(premier, dernier)))
+
+    def positions(self, debut, fin, pays: List[str]) -> Union[slice, np.ndarray]:
+        tranche = self.tranche(debut, fin)
+        if set(pays) >= set(self.positions_pays):
+            return tranche
+
+        morceaux = []
+        for p in pays:
+            positions_pays = self.positions_pays.get(str(p))
+            if positions_pays is None:
+                continue
+            i, j = np.searchsorted(positions_pays, [tranche.start, tranche.stop])
+            morceaux.append(positions_pays[i:j])
+        if not morceaux:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(morceaux))
+
+    def filtrer(self, df: pd.DataFrame, debut, fin, pays: List[str]) -> pd.DataFrame:
+        positions = self.positions(debut, fin, pays)
+        if isinstance(positions, slice):
+            return df.iloc[positions]
+        return df.take(positions)
@@ -0,0 +1,232 @@
+import json
+import os
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+from cache_donnees import empreinte_fichier, typer_colonnes
+from index_temporel import trier_par_date
+from pipeline_nettoyage import concatener_lignes, etapes_incrementales, executer_pipeline
+
+# ===============================
+# Ingestion incrémentale des extraits de factures
+# ===============================
+# Les nouveaux extraits (CSV, XLSX, Parquet) déposés dans le dossier de dépôt
+# sont nettoyés seuls, avec les règles de ETAPES_COMPLETES et les bornes de
+# quantités fixées au premier lot, puis ajoutés à un entrepôt colonnaire
+# partitionné par mois (un fichier Feather par lot et par mois). L'entrepôt est
+# en ajout seul : un fichier déjà ingéré (même nom) n'est jamais relu, un fichier
+# de même contenu (empreinte SHA-256) sous un autre nom est ignoré, et les lignes
+# d'un extrait qui recoupe les lots précédents (déjà présentes dans les
+# partitions des mois qu'il touche) sont retirées avant l'écriture.
+# Le manifeste décrit chaque partition (lot, premier et dernier InvoiceDate,
+# pays présents) : une lecture filtrée n'ouvre que les partitions qui
+# recoupent la période et les pays demandés.
+
+DOSSIER_DEPOT = "depot"
+DOSSIER_ENTREPOT = ".entrepot"
+
+# Colonnes d'origine d'une transaction : deux lignes égales sur ces colonnes sont un doublon
+COLONNES_TRANSACTION = ["InvoiceNo", "StockCode", "Description", "Quantity", "InvoiceDate",
+                        "UnitPrice", "CustomerID", "Country"]
+
+
+def lire_extrait(chemin: str) -> pd.DataFrame:
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension == ".csv":
+        df = pd.read_csv(chemin, dtype={"InvoiceNo": str, "StockCode": str})
+    elif extension == ".xlsx":
+        df = pd.read_excel(chemin)
+    elif extension == ".parquet":
+        df = pd.read_parquet(chemin)
+    else:
+        raise ValueError(f"Format d'extrait non pris en charge : {chemin}")
+    if not pd.api.types.is_datetime64_any_dtype(df["InvoiceDate"]):
+        df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"])
+    return typer_colonnes(df)
+
+
+def empreintes_lignes(lignes: pd.DataFrame) -> np.ndarray:
+    # Empreintes 64 bits des lignes, indépendantes des vocabulaires catégoriels et
+    # de la résolution des dates, pour comparer un lot aux partitions écrites
+    colonnes = {}
+    for col in COLONNES_TRANSACTION:
+        serie = lignes[col]
+        if col == "InvoiceDate":
+            serie = serie.astype("datetime64[ns]").astype(np.int64)
+        elif pd.api.types.is_numeric_dtype(serie):
+            serie = serie.astype(np.float64)
+        else:
+            serie = serie.astype(str)
+        colonnes[col] = serie.to_numpy()
+    return pd.util.hash_pandas_object(pd.DataFrame(colonnes), index=False).to_numpy()
+
+
+class Entrepot:
+    EXTENSIONS = (".csv", ".xlsx", ".parquet")
+
+    def __init__(self, dossier: str = DOSSIER_ENTREPOT):
+        self.dossier = dossier
+        self._verrou = Lock()
+        self._chemin_manifeste = os.path.join(dossier, "manifeste.json")
+        try:
+            with open(self._chemin_manifeste, encoding="utf-8") as f:
+                self.manifeste = json.load(f)
+        except (OSError, ValueError):
+            self.manifeste = {"lots": 0, "fichiers": {}, "seuils": {}, "partitions": {}}
+
+    @property
+    def nb_lots(self) -> int:
+        return self.manifeste["lots"]
+
+    @property
+    def vide(self) -> bool:
+        return self.nb_lots == 0
+
+    def _enregistrer_manifeste(self) -> None:
+        os.makedirs(self.dossier, exist_ok=True)
+        tmp = self._chemin_manifeste + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifeste, f, indent=1)
+        os.replace(tmp, self._chemin_manifeste)
+
+    @staticmethod
+    def _description(lignes: pd.DataFrame, lot: int) -> dict:
+        dates = lignes["InvoiceDate"]
+        return {
+            "lot": lot,
+            "lignes": len(lignes),
+            "debut": dates.min().value,
+            "fin": dates.max().value,
+            "pays": sorted(str(p) for p in lignes["Country"].unique()),
+        }
+
+    def _lire_partition(self, chemin: str) -> pd.DataFrame:
+        return feather.read_table(os.path.join(self.dossier, chemin), memory_map=True).to_pandas()
+
+    def fichiers_nouveaux(self, depot: str = DOSSIER_DEPOT) -> List[str]:
+        if not os.path.isdir(depot):
+            return []
+        return sorted(
+            os.path.join(depot, nom) for nom in os.listdir(depot)
+            if nom.lower().endswith(self.EXTENSIONS) and nom not in self.manifeste["fichiers"]
+        )
+
+    def empreintes_lots(self) -> List[str]:
+        # Identifiant du contenu de chaque lot, dans l'ordre des lots
+        lots = {infos["lot"]: infos.get("empreinte", nom)
+                for nom, infos in self.manifeste["fichiers"].items() if infos["lot"] is not None}
+        return [lots[lot] for lot in sorted(lots)]
+
+    def _retirer_deja_ingerees(self, lignes: pd.DataFrame) -> pd.DataFrame:
+        # Une ligne déjà ingérée a la même date, donc le même mois : seules les
+        # partitions des mois touchés par le lot sont relues
+        mois = set(lignes["InvoiceDate"].dt.to_period("M").astype(str))
+        chemins = [chemin for chemin in self.manifeste["partitions"] if os.path.dirname(chemin) in mois]
+        if not chemins or lignes.empty:
+            return lignes
+        existantes = concatener_lignes([self._lire_partition(chemin) for chemin in chemins])
+        nouvelles = ~np.isin(empreintes_lignes(lignes), empreintes_lignes(existantes))
+        return lignes.take(np.flatnonzero(nouvelles)).reset_index(drop=True)
+
+    def ajouter(self, brut: pd.DataFrame, nom: str, empreinte: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        # Nettoyage du lot seul ; les seuils du manifeste sont complétés au premier lot
+        lignes, rapport = executer_pipeline(brut, etapes_incrementales(self.manifeste["seuils"]))
+        nettoyees = len(lignes)
+        lignes = self._retirer_deja_ingerees(lignes)
+        infos = {"lot": None, "empreinte": empreinte or nom, "lignes_brutes": len(brut),
+                 "lignes": len(lignes), "deja_ingerees": nettoyees - len(lignes)}
+        if lignes.empty:
+            # Rien de nouveau : le fichier est noté comme vu, sans créer de lot
+            self.manifeste["fichiers"][nom] = infos
+            self._enregistrer_manifeste()
+            return lignes, rapport
+        lot = self.nb_lots + 1
+
+        # Un fichier par mois présent dans le lot
+        mois = lignes["InvoiceDate"].dt.to_period("M")
+        for periode, positions in lignes.groupby(mois, sort=True).indices.items():
+            dossier_mois = os.path.join(self.dossier, str(periode))
+            os.makedirs(dossier_mois, exist_ok=True)
+            chemin = os.path.join(dossier_mois, f"lot_{lot:06d}.feather")
+            partition = lignes.take(positions).reset_index(drop=True)
+            partition.to_feather(chemin + ".tmp", compression="uncompressed")
+            os.replace(chemin + ".tmp", chemin)
+            self.manifeste["partitions"][os.path.relpath(chemin, self.dossier)] = self._description(partition, lot)
+
+        self.manifeste["lots"] = lot
+        self.manifeste["fichiers"][nom] = dict(infos, lot=lot)
+        self._enregistrer_manifeste()
+        return lignes, rapport
+
+    def ingerer_depot(self, depot: str = DOSSIER_DEPOT) -> List[pd.DataFrame]:
+        # Lots nettoyés des fichiers apparus depuis le dernier passage (un seul
+        # passage à la fois quand l'entrepôt est partagé entre sessions)
+        with self._verrou:
+            lots = []
+            for chemin in self.fichiers_nouveaux(depot):
+                empreinte = empreinte_fichier(chemin)
+                if empreinte in self.empreintes_lots():
+                    # Extrait renvoyé sous un autre nom : non relu
+                    self.manifeste["fichiers"][os.path.basename(chemin)] = {
+                        "lot": None, "empreinte": empreinte, "lignes_brutes": 0, "lignes": 0, "deja_ingerees": 0}
+                    self._enregistrer_manifeste()
+                    continue
+                lignes, _ = self.ajouter(lire_extrait(chemin), os.path.basename(chemin), empreinte)
+                if not lignes.empty:
+                    lots.append(lignes)
+            return lots
+
+    def rapport(self) -> pd.DataFrame:
+        return pd.DataFrame([
+            {"Fichier": nom, "Lot": infos["lot"], "Lignes brutes": infos["lignes_brutes"],
+             "Lignes nettoyées": infos["lignes"], "Lignes déjà ingérées": infos.get("deja_ingerees", 0)}
+            for nom, infos in self.manifeste["fichiers"].items()
+        ]).astype({"Lot": "Int64"})
+
+    def version(self) -> int:
+        # Nombre de lots lu sous le verrou : aucun lot n'est en cours d'écriture
+        with self._verrou:
+            return self.nb_lots
+
+    def _instantane(self) -> Tuple[int, Dict[str, dict]]:
+        # Lots et partitions copiés ensemble sous le verrou : ingerer_depot peut
+        # compléter le manifeste depuis une autre session pendant la lecture
+        with self._verrou:
+            return self.nb_lots, dict(self.manifeste["partitions"])
+
+    def bornes_dates(self) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        partitions = self._instantane()[1].values()
+        return (pd.Timestamp(min(p["debut"] for p in partitions)),
+                pd.Timestamp(max(p["fin"] for p in partitions)))
+
+    def pays(self) -> List[str]:
+        return sorted(set().union(*(p["pays"] for p in self._instantane()[1].values())))
+
+    def partitions_selectionnees(self, debut=None, fin=None, pays: Optional[List[str]] = None,
+                                 depuis_lot: int = 0, jusqu_au_lot: Optional[int] = None) -> List[str]:
+        # Partitions qui recoupent [debut, fin] (jour de fin inclus) et les pays
+        # demandés, limitées aux lots depuis_lot + 1 à jusqu_au_lot (par défaut,
+        # le dernier lot enregistré au moment de la lecture)
+        nb_lots, partitions = self._instantane()
+        jusqu_au_lot = nb_lots if jusqu_au_lot is None else jusqu_au_lot
+        debut_ns = pd.Timestamp(debut).value if debut is not None else None
+        fin_ns = (pd.Timestamp(fin).normalize() + pd.Timedelta(days=1)).value if fin is not None else None
+        pays = set(pays) if pays is not None else None
+        return [
+            chemin for chemin, p in sorted(partitions.items())
+            if depuis_lot < p["lot"] <= jusqu_au_lot
+            and (debut_ns is None or p["fin"] >= debut_ns)
+            and (fin_ns is None or p["debut"] < fin_ns)
+            and (pays is None or not pays.isdisjoint(p["pays"]))
+        ]
+
+    def charger(self, debut=None, fin=None, pays: Optional[List[str]] = None, depuis_lot: int = 0,
+                jusqu_au_lot: Optional[int] = None) -> pd.DataFrame:
+        chemins = self.partitions_selectionnees(debut, fin, pays, depuis_lot, jusqu_au_lot)
+        if not chemins:
+            return pd.DataFrame()
+        return trier_par_date(concatener_lignes([self._lire_partition(chemin) for chemin in chemins]))
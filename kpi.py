@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# ===============================
+# Noyau KPI fusionné
+# ===============================
+# Toutes les métriques du tableau de bord exécutif sont calculées en un seul
+# passage sur des colonnes codées en entiers : chaque ligne reçoit un type
+# (vente, annulation, retour), les sommes sont des bincount pondérés par type
+# et les comptes distincts des bitsets indexés par (code, type).
+
+TYPE_VENTE = 0
+TYPE_ANNULATION = 1
+TYPE_RETOUR = 2
+TYPE_AUTRE = 3
+NB_TYPES = 4
+
+
+@dataclass(frozen=True)
+class KPIs:
+    ca_total: float
+    nb_commandes: int
+    nb_clients: int
+    panier_moyen: float
+    nb_annulations: int
+    produits_annules: int
+    valeur_annulations: float
+    ca_retours: float
+    nb_retours: int
+    nb_clients_retours: int
+    nb_commandes_total: int
+    nb_clients_total: int
+
+
+def codes_entiers(serie: pd.Series) -> np.ndarray:
+    # Codes >= 0, -1 pour les valeurs manquantes
+    return codes_partages([serie])[0]
+
+
+def codes_partages(series: List[pd.Series]) -> List[np.ndarray]:
+    # Codes cohérents entre plusieurs colonnes (partitions d'une même table) :
+    # une même valeur reçoit le même code dans chaque colonne
+    if all(isinstance(s.dtype, pd.CategoricalDtype) for s in series):
+        # Égalité de dtype insuffisante : deux catégoriels non ordonnés sont égaux
+        # quel que soit l'ordre de leurs catégories, et leurs codes diffèrent alors
+        if all(s.cat.categories.equals(series[0].cat.categories) for s in series):
+            return [s.cat.codes.to_numpy().astype(np.int64) for s in series]
+        codes = union_categoricals(series).codes.astype(np.int64)
+        return np.split(codes, np.cumsum([len(s) for s in series[:-1]]))
+    if all(pd.api.types.is_numeric_dtype(s) for s in series):
+        valeurs = [s.to_numpy(dtype=np.float64) for s in series]
+        connues = np.concatenate([v[~np.isnan(v)] for v in valeurs])
+        entiers = len(connues) > 0 and np.array_equal(connues, np.floor(connues))
+        # Identifiants entiers peu dispersés (CustomerID) : décalage par le minimum, sans hachage
+        if entiers and np.ptp(connues) <= 4 * sum(len(v) for v in valeurs) + 1024:
+            minimum = int(connues.min())
+            codes = []
+            for v in valeurs:
+                connus = ~np.isnan(v)
+                c = np.full(len(v), -1, dtype=np.int64)
+                c[connus] = v[connus].astype(np.int64) - minimum
+                codes.append(c)
+            return codes
+    if len(series) == 1:
+        return [pd.factorize(series[0])[0].astype(np.int64)]
+    # Vocabulaire commun : union des valeurs distinctes de chaque colonne
+    vocabulaire = pd.Index(pd.unique(np.concatenate([pd.unique(s.dropna().to_numpy()) for s in series])))
+    return [vocabulaire.get_indexer(s).astype(np.int64) for s in series]
+
+
+def types_transactions(df: pd.DataFrame, annulations_separees: bool = True) -> np.ndarray:
+    quantite = df["Quantity"].to_numpy()
+    types = np.full(len(df), TYPE_AUTRE, dtype=np.int8)
+    types[quantite > 0] = TYPE_VENTE
+    types[quantite < 0] = TYPE_RETOUR
+    if annulations_separees:
+        types[df["Is_Cancellation"].to_numpy()] = TYPE_ANNULATION
+    return types
+
+
+def _distincts_par_type(codes: np.ndarray, types: np.ndarray):
+    connus = codes >= 0
+    taille = int(codes.max()) + 1 if connus.any() else 0
+    vus = np.zeros((taille, NB_TYPES), dtype=bool)
+    vus[codes[connus], types[connus]] = True
+    return vus.sum(axis=0), int(vus.any(axis=1).sum())
+
+
+def _assembler(revenu, quantite, factures, factures_total, clients, clients_total) -> KPIs:
+    ca_total = float(revenu[TYPE_VENTE])
+    nb_commandes = int(factures[TYPE_VENTE])
+    return KPIs(
+        ca_total=ca_total,
+        nb_commandes=nb_commandes,
+        nb_clients=int(clients[TYPE_VENTE]),
+        panier_moyen=ca_total / nb_commandes if nb_commandes > 0 else 0,
+        nb_annulations=int(factures[TYPE_ANNULATION]),
+        produits_annules=int(abs(quantite[TYPE_ANNULATION])),
+        valeur_annulations=float(abs(revenu[TYPE_ANNULATION])),
+        ca_retours=float(abs(revenu[TYPE_RETOUR])),
+        nb_retours=int(factures[TYPE_RETOUR]),
+        nb_clients_retours=int(clients[TYPE_RETOUR]),
+        nb_commandes_total=factures_total,
+        nb_clients_total=clients_total,
+    )
+
+
+def calculer_kpis(df: pd.DataFrame, types: Optional[np.ndarray] = None,
+                  compter_clients: bool = True) -> KPIs:
+    # compter_clients=False (mode approché) : clients comptés ailleurs, laissés à 0
+    if types is None:
+        types = types_transactions(df)
+
+    revenu = np.bincount(types, weights=df["Revenue"].to_numpy(), minlength=NB_TYPES)
+    quantite = np.bincount(types, weights=df["Quantity"].to_numpy(), minlength=NB_TYPES)
+    factures, factures_total = _distincts_par_type(codes_entiers(df["InvoiceNo"]), types)
+    if compter_clients:
+        clients, clients_total = _distincts_par_type(codes_entiers(df["CustomerID"]), types)
+    else:
+        clients, clients_total = np.zeros(NB_TYPES, dtype=np.int64), 0
+    return _assembler(revenu, quantite, factures, factures_total, clients, clients_total)
+
+
+def calculer_kpis_partitions(ventes: pd.DataFrame, annulations: pd.DataFrame,
+                             retours: pd.DataFrame, compter_clients: bool = True) -> KPIs:
+    # Partitions déjà séparées : chacune n'a qu'un type, le noyau la parcourt sur
+    # place (sans concaténation) ; les sommes par type s'additionnent et les
+    # distincts tous types confondus sont l'union des bitsets des partitions
+    morceaux = [(ventes, TYPE_VENTE), (annulations, TYPE_ANNULATION), (retours, TYPE_RETOUR)]
+    revenu = np.zeros(NB_TYPES)
+    quantite = np.zeros(NB_TYPES)
+    for morceau, type_ in morceaux:
+        revenu[type_] = morceau["Revenue"].to_numpy(dtype=np.float64).sum()
+        quantite[type_] = morceau["Quantity"].to_numpy(dtype=np.float64).sum()
+
+    factures, factures_total = _distincts_partitions(morceaux, "InvoiceNo")
+    if compter_clients:
+        clients, clients_total = _distincts_partitions(morceaux, "CustomerID")
+    else:
+        clients, clients_total = np.zeros(NB_TYPES, dtype=np.int64), 0
+    return _assembler(revenu, quantite, factures, factures_total, clients, clients_total)
+
+
+def _distincts_partitions(morceaux: List[Tuple[pd.DataFrame, int]], colonne: str):
+    codes = codes_partages([morceau[colonne] for morceau, _ in morceaux])
+    taille = max((int(c.max()) + 1 for c in codes if len(c)), default=0)
+    par_type = np.zeros(NB_TYPES, dtype=np.int64)
+    vus_total = np.zeros(taille, dtype=bool)
+    for c, (_, type_) in zip(codes, morceaux):
+        vus = np.zeros(taille, dtype=bool)
+        vus[c[c >= 0]] = True
+        par_type[type_] = int(vus.sum())
+        vus_total |= vus
+    return par_type, int(vus_total.sum())
@@ -0,0 +1,103 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Set, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# ===============================
+# Lecture parallèle par morceaux (CSV)
+# ===============================
+# Le fichier est découpé en plages d'octets alignées sur les fins de ligne (les
+# champs entre guillemets ne doivent pas contenir de retour à la ligne), lues
+# chacune dans un processus, puis concaténées. Les colonnes de texte sont fixées
+# une fois sur un échantillon de tête et lues en texte par chaque processus ; les
+# autres sont typées par read_csv dans le processus, qui renvoie des colonnes
+# déjà typées. Une colonne numérique dans l'échantillon mais pas dans tous les
+# morceaux est relue en texte, comme read_csv sur le fichier entier : le résultat
+# est celui d'une lecture en série, et le parent ne fait que concaténer. Le
+# dédoublonnage reste celui de nettoyer_donnees.
+# Un XLSX n'a pas de lecture parallèle : chaque bloc devrait relire la feuille
+# depuis son début, sans gain sur une lecture en série.
+
+MORCEAUX_PAR_PROCESSUS = 4
+TAILLE_ECHANTILLON_TYPES = 10_000  # lignes de tête lues pour fixer les colonnes de texte
+
+
+def nb_processus_effectif(nb_processus: int) -> int:
+    # 0 ou moins : tous les cœurs disponibles
+    return nb_processus if nb_processus > 0 else (os.cpu_count() or 1)
+
+
+def decouper_csv(fichier: str, nb_morceaux: int) -> List[Tuple[int, int]]:
+    taille = os.path.getsize(fichier)
+    with open(fichier, "rb") as f:
+        f.readline()  # en-tête
+        bornes = [f.tell()]
+        pas = max((taille - bornes[0]) // nb_morceaux, 1)
+        for i in range(1, nb_morceaux):
+            position = bornes[0] + i * pas
+            if position <= bornes[-1] or position >= taille:
+                continue
+            # Fin de la ligne coupée : le morceau suivant commence sur une ligne entière
+            f.seek(position)
+            f.readline()
+            if f.tell() > bornes[-1]:
+                bornes.append(f.tell())
+        bornes.append(taille)
+    return [(debut, fin) for debut, fin in zip(bornes[:-1], bornes[1:]) if fin > debut]
+
+
+def _lire_plage_csv(fichier: str, debut: int, fin: int, colonnes: List[str], sep: str,
+                    texte: Set[str]) -> pd.DataFrame:
+    with open(fichier, "rb") as f:
+        f.seek(debut)
+        contenu = f.read(fin - debut)
+    return pd.read_csv(io.BytesIO(contenu), header=None, names=colonnes, sep=sep,
+                       dtype={col: str for col in texte})
+
+
+def _lire_plages(executeur: ProcessPoolExecutor, fichier: str, plages: List[Tuple[int, int]],
+                 colonnes: List[str], sep: str, texte: Set[str]) -> List[pd.DataFrame]:
+    return list(executeur.map(
+        _lire_plage_csv,
+        *zip(*[(fichier, debut, fin, colonnes, sep, texte) for debut, fin in plages]),
+    ))
+
+
+def lire_csv_parallele(fichier: str, nb_processus: int, sep: str = ",") -> pd.DataFrame:
+    nb_processus = nb_processus_effectif(nb_processus)
+    echantillon = pd.read_csv(fichier, sep=sep, nrows=TAILLE_ECHANTILLON_TYPES)
+    colonnes = list(echantillon.columns)
+    texte = {col for col in colonnes if not pd.api.types.is_numeric_dtype(echantillon[col])}
+    plages = decouper_csv(fichier, nb_processus * MORCEAUX_PAR_PROCESSUS)
+    if not plages:
+        return echantillon
+    with ProcessPoolExecutor(max_workers=nb_processus) as executeur:
+        morceaux = _lire_plages(executeur, fichier, plages, colonnes, sep, texte)
+        # Valeurs non numériques hors de l'échantillon : colonne relue en texte partout
+        a_relire = {col for morceau in morceaux for col in colonnes
+                    if col not in texte and not pd.api.types.is_numeric_dtype(morceau[col])}
+        if a_relire:
+            morceaux = _lire_plages(executeur, fichier, plages, colonnes, sep, texte | a_relire)
+    return pd.concat(morceaux, ignore_index=True)
+
+
+# === XLSX : lecture en flux ===
+def iterer_excel(fichier: str, taille_morceau: int) -> Iterator[pd.DataFrame]:
+    # Lecture en flux (mode flux de version_2) : un DataFrame par bloc de lignes
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        colonnes = [str(c) for c in next(lignes, ())]
+        bloc = []
+        for ligne in lignes:
+            bloc.append(ligne)
+            if len(bloc) == taille_morceau:
+                yield pd.DataFrame.from_records(bloc, columns=colonnes)
+                bloc = []
+        if bloc:
+            yield pd.DataFrame.from_records(bloc, columns=colonnes)
+    finally:
+        classeur.close()
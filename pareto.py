@@ -0,0 +1,170 @@
+from typing import Hashable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cache_lru import CacheLRU
+
+# ===============================
+# Analyse de Pareto des produits
+# ===============================
+# Le CA par produit est conservé sous forme de tableaux. Un top-k est obtenu par
+# argpartition (sans trier tout le catalogue), la courbe cumulée n'est triée
+# qu'une fois puis réutilisée, et le nombre exact de produits nécessaires pour
+# atteindre un pourcentage du CA est trouvé par recherche dichotomique.
+# Pour tracer tout le catalogue, rendu() borne le nombre de points : produits
+# de tête un par un, longue traîne regroupée en classes de rangs de même
+# largeur, courbe cumulée simplifiée par LTTB (forme conservée, seuil de 80 %
+# toujours présent).
+
+BUDGET_POINTS = 1_000
+
+
+def lttb(x: np.ndarray, y: np.ndarray, nb_points: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets : indices des points gardés (premier et dernier
+    # inclus) ; dans chaque seau, le point qui forme le plus grand triangle avec le
+    # point retenu précédemment et la moyenne du seau suivant
+    n = len(x)
+    if nb_points >= n or nb_points < 3:
+        return np.arange(n)
+    bornes = np.linspace(1, n - 1, nb_points - 1).astype(np.int64)
+    indices = np.empty(nb_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    retenu = 0
+    for i in range(nb_points - 2):
+        debut, fin = bornes[i], max(bornes[i + 1], bornes[i] + 1)
+        if i + 2 < len(bornes):
+            moyenne_x, moyenne_y = x[fin:bornes[i + 2]].mean(), y[fin:bornes[i + 2]].mean()
+        else:
+            moyenne_x, moyenne_y = x[-1], y[-1]
+        aires = np.abs((x[retenu] - moyenne_x) * (y[debut:fin] - y[retenu])
+                       - (x[retenu] - x[debut:fin]) * (moyenne_y - y[retenu]))
+        retenu = debut + int(np.argmax(aires))
+        indices[i + 1] = retenu
+    return indices
+
+
+def revenus_par_produit(lignes: pd.DataFrame, colonne: str = "Description") -> Tuple[np.ndarray, np.ndarray]:
+    produits = lignes[colonne]
+    revenus = lignes["Revenue"].to_numpy(dtype=np.float64)
+    if isinstance(produits.dtype, pd.CategoricalDtype):
+        # Somme par code de modalité, sans hachage des libellés
+        codes = produits.cat.codes.to_numpy()
+        connus = codes >= 0
+        nb = len(produits.cat.categories)
+        ca = np.bincount(codes[connus], weights=revenus[connus], minlength=nb)
+        presents = np.bincount(codes[connus], minlength=nb) > 0
+        return produits.cat.categories.to_numpy()[presents], ca[presents]
+    ca = lignes.groupby(colonne)["Revenue"].sum()
+    return ca.index.to_numpy(), ca.to_numpy(dtype=np.float64)
+
+
+class AnalysePareto:
+    def __init__(self, produits: np.ndarray, revenus: np.ndarray):
+        self.produits = np.asarray(produits)
+        self.revenus = np.asarray(revenus, dtype=np.float64)
+        self.total = float(self.revenus.sum())
+        self._ordre = None
+        self._cumul = None
+
+    @property
+    def nb_produits(self) -> int:
+        return len(self.revenus)
+
+    def _indices_top(self, k: int) -> np.ndarray:
+        k = min(k, self.nb_produits)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if self._ordre is not None:
+            return self._ordre[:k]
+        candidats = np.argpartition(-self.revenus, k - 1)[:k]
+        return candidats[np.argsort(-self.revenus[candidats], kind="stable")]
+
+    def _tri_complet(self) -> None:
+        if self._ordre is None:
+            self._ordre = np.argsort(-self.revenus, kind="stable")
+            self._cumul = np.cumsum(self.revenus[self._ordre])
+
+    def top(self, k: int) -> pd.DataFrame:
+        indices = self._indices_top(k)
+        revenus = self.revenus[indices]
+        return pd.DataFrame({
+            "Description": self.produits[indices],
+            "Revenue": revenus,
+            "cumperc": np.cumsum(revenus) / self.total * 100 if self.total else np.zeros(len(revenus)),
+        })
+
+    def ca_top(self, k: int) -> float:
+        return float(self.revenus[self._indices_top(k)].sum())
+
+    def classement(self) -> pd.DataFrame:
+        return self.top(self.nb_produits)
+
+    def courbe(self) -> Tuple[np.ndarray, np.ndarray]:
+        # (% des produits, % du CA cumulé), calculée une seule fois
+        self._tri_complet()
+        rangs = np.arange(1, self.nb_produits + 1)
+        return rangs / self.nb_produits * 100, self._cumul / self.total * 100
+
+    def nb_produits_pour(self, part_ca: float = 0.8) -> int:
+        self._tri_complet()
+        if self.nb_produits == 0:
+            return 0
+        rang = np.searchsorted(self._cumul, part_ca * self.total, side="left")
+        return int(min(rang + 1, self.nb_produits))
+
+    def rendu(self, budget: int = BUDGET_POINTS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        # (barres, courbe) en au plus ~budget points : un quart de barres de tête,
+        # un quart de classes de traîne, la moitié pour la courbe cumulée
+        self._tri_complet()
+        n = self.nb_produits
+        revenus = self.revenus[self._ordre]
+        rangs = np.arange(1, n + 1)
+
+        nb_tete = min(n, budget // 4)
+        tete = pd.DataFrame({
+            "Libelle": self.produits[self._ordre[:nb_tete]],
+            "Rang": rangs[:nb_tete].astype(np.float64),
+            "Largeur": 1.0,
+            "Revenue": revenus[:nb_tete],
+            "CA": revenus[:nb_tete],
+            "Nb produits": 1,
+        })
+        nb_classes = min(n - nb_tete, budget // 4)
+        if nb_classes:
+            debuts = np.unique(np.linspace(nb_tete, n, nb_classes + 1).astype(np.int64)[:-1])
+            fins = np.append(debuts[1:], n)
+            ca = np.add.reduceat(revenus, debuts)
+            traine = pd.DataFrame({
+                "Libelle": [f"Rangs {d + 1}–{f}" for d, f in zip(debuts.tolist(), fins.tolist())],
+                "Rang": (debuts + fins + 1) / 2,
+                "Largeur": (fins - debuts).astype(np.float64),
+                "Revenue": ca / (fins - debuts),  # CA moyen par produit de la classe
+                "CA": ca,
+                "Nb produits": fins - debuts,
+            })
+            tete = pd.concat([tete, traine], ignore_index=True)
+
+        cumperc = self._cumul / self.total * 100 if self.total else np.zeros(n)
+        # Courbe exacte sur les produits de tête, simplifiée par LTTB au-delà
+        gardes = np.arange(n)
+        if n > budget // 2 and nb_tete:
+            traine = lttb(rangs[nb_tete - 1:].astype(np.float64), cumperc[nb_tete - 1:], max(budget // 2 - nb_tete, 3))
+            gardes = np.union1d(np.arange(nb_tete), nb_tete - 1 + traine)
+        if n:
+            gardes = np.union1d(gardes, [self.nb_produits_pour(0.8) - 1])
+        courbe = pd.DataFrame({
+            "Rang": rangs[gardes],
+            "Description": self.produits[self._ordre[gardes]],
+            "cumperc": cumperc[gardes],
+        })
+        return tete, courbe
+
+
+class ServicePareto:
+    def __init__(self, capacite: int = 32):
+        self._cache = CacheLRU(capacite)
+
+    def analyse(self, cle: Hashable, lignes: pd.DataFrame) -> AnalysePareto:
+        # Une analyse par état de filtre ; les lignes ne sont agrégées qu'au premier appel
+        return self._cache.obtenir(cle, lambda: AnalysePareto(*revenus_par_produit(lignes)))
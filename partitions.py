@@ -0,0 +1,70 @@
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from index_temporel import IndexTemporel, trier_par_date
+from kpi import TYPE_ANNULATION, TYPE_RETOUR, TYPE_VENTE, types_transactions
+from pipeline_nettoyage import concatener_lignes
+
+# ===============================
+# Partitions ventes / retours / annulations
+# ===============================
+# Les transactions nettoyées (triées par date) sont séparées une seule fois au
+# chargement, à partir de la colonne Is_Cancellation et du signe de la quantité.
+# Chaque partition garde son propre index temporel et par pays : les filtres de
+# la barre latérale s'appliquent ensuite à chacune sans opération sur les chaînes
+# ni copie complète.
+
+
+@dataclass
+class Partition:
+    lignes: pd.DataFrame
+    index: IndexTemporel
+
+    def filtrer(self, debut, fin, pays: List[str]) -> pd.DataFrame:
+        return self.index.filtrer(self.lignes, debut, fin, pays)
+
+    def ajouter(self, lot: "Partition") -> None:
+        # Lot ingéré : lignes concaténées puis retriées (quasi triées, tri stable rapide)
+        if lot.lignes.empty:
+            return
+        self.lignes = trier_par_date(concatener_lignes([self.lignes, lot.lignes]))
+        self.index = IndexTemporel(self.lignes)
+
+
+@dataclass
+class PartitionsTransactions:
+    ventes: Partition
+    retours: Partition
+    annulations: Partition
+
+    def toutes(self) -> List[Partition]:
+        return [self.ventes, self.retours, self.annulations]
+
+    def bornes_dates(self):
+        dates = [p.lignes["InvoiceDate"] for p in self.toutes() if not p.lignes.empty]
+        return min(d.iloc[0] for d in dates), max(d.iloc[-1] for d in dates)
+
+    def pays(self) -> List[str]:
+        return sorted(set().union(*(p.index.positions_pays for p in self.toutes())))
+
+    def ajouter(self, lot: "PartitionsTransactions") -> None:
+        for partition, partition_lot in zip(self.toutes(), lot.toutes()):
+            partition.ajouter(partition_lot)
+
+
+def partitionner(df: pd.DataFrame) -> PartitionsTransactions:
+    types = types_transactions(df)
+
+    def creer(type_transaction: int) -> Partition:
+        # take conserve l'ordre chronologique du DataFrame source
+        lignes = df.take(np.flatnonzero(types == type_transaction)).reset_index(drop=True)
+        return Partition(lignes=lignes, index=IndexTemporel(lignes))
+
+    return PartitionsTransactions(
+        ventes=creer(TYPE_VENTE),
+        retours=creer(TYPE_RETOUR),
+        annulations=creer(TYPE_ANNULATION),
+    )
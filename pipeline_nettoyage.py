@@ -0,0 +1,228 @@
+import hashlib
+import inspect
+import json
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from index_temporel import trier_par_date
+
+# ===============================
+# Pipeline de nettoyage partagé par les tableaux de bord
+# ===============================
+# Une étape est soit un filtre, qui reçoit le DataFrame et le masque des lignes
+# conservées et renvoie un nouveau masque, soit une étape de colonnes, qui modifie
+# le DataFrame en place ou renvoie un nouveau DataFrame (tri par exemple).
+# Les filtres consécutifs sont fusionnés : les lignes ne sont extraites (une
+# seule copie, via take) qu'avant la prochaine étape de colonnes.
+
+
+@dataclass(frozen=True)
+class Etape:
+    nom: str
+    fonction: Callable
+    filtre: bool = False
+
+
+def commence_par_c(serie: pd.Series) -> np.ndarray:
+    # Sur une colonne catégorielle, le test est fait une seule fois par modalité
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        par_modalite = serie.cat.categories.astype(str).str.startswith("C")
+        codes = serie.cat.codes.to_numpy()
+        return np.where(codes >= 0, par_modalite[codes], False)
+    return serie.astype(str).str.startswith("C").to_numpy()
+
+
+COLONNES_DICTIONNAIRE = ["InvoiceNo", "StockCode", "Description", "Country"]
+TYPES_COMPACTS = {
+    "Quantity": np.int32,
+    "UnitPrice": np.float32,
+}
+
+
+# === Étapes de filtre ===
+def filtre_client_connu(df: pd.DataFrame, masque: np.ndarray) -> np.ndarray:
+    return masque & df["CustomerID"].notna().to_numpy()
+
+
+def filtre_prix_positif(df: pd.DataFrame, masque: np.ndarray) -> np.ndarray:
+    return masque & (df["UnitPrice"].to_numpy() > 0)
+
+
+def filtre_quantite_positive(df: pd.DataFrame, masque: np.ndarray) -> np.ndarray:
+    return masque & (df["Quantity"].to_numpy() > 0)
+
+
+def filtre_doublons(df: pd.DataFrame, masque: np.ndarray) -> np.ndarray:
+    # Les filtres précédents ne dépendent que de la ligne : deux doublons sont
+    # conservés ou exclus ensemble, on peut donc dédupliquer sur le tableau complet
+    return masque & ~df.duplicated().to_numpy()
+
+
+def bornes_quantites(df: pd.DataFrame, masque: np.ndarray) -> Optional[Tuple[float, float]]:
+    # Quantiles 1% / 99% calculés sur les transactions normales
+    normales = masque & ~df["Is_Cancellation"].to_numpy()
+    if not normales.any():
+        return None
+    q_bas, q_haut = np.quantile(df["Quantity"].to_numpy()[normales], [0.01, 0.99])
+    return float(q_bas), float(q_haut)
+
+
+def _quantites_dans(df: pd.DataFrame, masque: np.ndarray, bornes: Tuple[float, float]) -> np.ndarray:
+    # Annulations conservées quelle que soit leur quantité
+    quantite = df["Quantity"].to_numpy()
+    return masque & (df["Is_Cancellation"].to_numpy() | ((quantite >= bornes[0]) & (quantite <= bornes[1])))
+
+
+def filtre_quantites_aberrantes(df: pd.DataFrame, masque: np.ndarray) -> np.ndarray:
+    bornes = bornes_quantites(df, masque)
+    return masque if bornes is None else _quantites_dans(df, masque, bornes)
+
+
+def filtre_quantites_persistees(seuils: dict) -> Callable:
+    # Ingestion par lots : les bornes sont calculées sur le premier lot puis
+    # conservées dans seuils, pour que chaque lot soit nettoyé avec les mêmes règles
+    def filtre(df: pd.DataFrame, masque: np.ndarray) -> np.ndarray:
+        if "quantite" not in seuils:
+            bornes = bornes_quantites(df, masque)
+            if bornes is None:
+                return masque
+            seuils["quantite"] = list(bornes)
+        return _quantites_dans(df, masque, seuils["quantite"])
+    return filtre
+
+
+# === Étapes de colonnes ===
+def marquer_annulations(df: pd.DataFrame) -> None:
+    df["Is_Cancellation"] = commence_par_c(df["InvoiceNo"])
+
+
+def calculer_revenu(df: pd.DataFrame) -> None:
+    df["Revenue"] = df["Quantity"] * df["UnitPrice"]
+
+
+def compacter_colonnes(df: pd.DataFrame) -> None:
+    # Chaînes encodées en dictionnaire (codes entiers + vocabulaire partagé par les
+    # partitions), entiers et flottants réduits. Revenue reste en float64 pour
+    # que les totaux soient exacts.
+    for col in COLONNES_DICTIONNAIRE:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    if "CustomerID" in df.columns and df["CustomerID"].notna().all():
+        df["CustomerID"] = df["CustomerID"].astype(np.int32)
+    for col, type_compact in TYPES_COMPACTS.items():
+        if col in df.columns:
+            df[col] = df[col].astype(type_compact)
+
+
+def concatener_lignes(morceaux: List[pd.DataFrame]) -> pd.DataFrame:
+    # pd.concat repasse en object les colonnes catégorielles dont les vocabulaires
+    # diffèrent (lots nettoyés séparément) : elles sont recodées sur l'union
+    morceaux = [m for m in morceaux if len(m)] or morceaux[:1]
+    df = pd.concat(morceaux, ignore_index=True)
+    for col in df.columns:
+        if (not isinstance(df[col].dtype, pd.CategoricalDtype)
+                and all(isinstance(m[col].dtype, pd.CategoricalDtype) for m in morceaux)):
+            df[col] = union_categoricals([m[col] for m in morceaux])
+    return df
+
+
+# === Pipelines prédéfinis ===
+# stream.py / stream_2.py : clients connus, prix positifs
+ETAPES_BASE = [
+    Etape("Clients connus", filtre_client_connu, filtre=True),
+    Etape("Prix positifs", filtre_prix_positif, filtre=True),
+    Etape("Revenu", calculer_revenu),
+    Etape("Encodage compact", compacter_colonnes),
+]
+
+# Data_viz.py : ventes uniquement (retours exclus)
+ETAPES_VENTES = [
+    Etape("Clients connus", filtre_client_connu, filtre=True),
+    Etape("Quantités positives", filtre_quantite_positive, filtre=True),
+    Etape("Prix positifs", filtre_prix_positif, filtre=True),
+    Etape("Revenu", calculer_revenu),
+    Etape("Encodage compact", compacter_colonnes),
+]
+
+# visual.py : nettoyage complet avec annulations et valeurs aberrantes
+ETAPES_COMPLETES = [
+    Etape("Annulations", marquer_annulations),
+    Etape("Clients connus", filtre_client_connu, filtre=True),
+    Etape("Prix positifs", filtre_prix_positif, filtre=True),
+    Etape("Doublons", filtre_doublons, filtre=True),
+    Etape("Quantités aberrantes", filtre_quantites_aberrantes, filtre=True),
+    Etape("Revenu", calculer_revenu),
+    Etape("Encodage compact", compacter_colonnes),
+    Etape("Tri chronologique", trier_par_date),
+]
+
+
+# Ingestion incrémentale : mêmes étapes que ETAPES_COMPLETES, bornes de quantités persistées
+def etapes_incrementales(seuils: dict) -> List[Etape]:
+    return [
+        Etape("Quantités aberrantes", filtre_quantites_persistees(seuils), filtre=True)
+        if etape.fonction is filtre_quantites_aberrantes else etape
+        for etape in ETAPES_COMPLETES
+    ]
+
+
+def empreinte_pipeline(etapes: List[Etape], parametres: Optional[dict] = None) -> str:
+    # Identifie les règles de nettoyage (noms et code des étapes, paramètres
+    # persistés) : un état dérivé des données nettoyées est reconstruit quand
+    # elle change
+    sha = hashlib.sha256()
+    for etape in etapes:
+        sha.update(etape.nom.encode())
+        sha.update(inspect.getsource(etape.fonction).encode())
+    sha.update(json.dumps(parametres or {}, sort_keys=True).encode())
+    return sha.hexdigest()
+
+
+def executer_pipeline(df: pd.DataFrame, etapes: List[Etape]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    rapport = []
+    masque = np.ones(len(df), dtype=bool)
+    filtre_en_attente = False
+
+    def mesurer(nom, debut, lignes_entree, lignes_sortie):
+        rapport.append({
+            "Étape": nom,
+            "Lignes entrée": lignes_entree,
+            "Lignes sortie": lignes_sortie,
+            "Durée (s)": round(time.perf_counter() - debut, 4),
+        })
+
+    def materialiser():
+        nonlocal df, masque, filtre_en_attente
+        debut = time.perf_counter()
+        lignes_entree = len(df)
+        # take ne marque pas le résultat comme une vue : pas de SettingWithCopyWarning
+        df = df.take(np.flatnonzero(masque))
+        masque = np.ones(len(df), dtype=bool)
+        filtre_en_attente = False
+        mesurer("Extraction des lignes", debut, lignes_entree, len(df))
+
+    for etape in etapes:
+        if etape.filtre:
+            debut = time.perf_counter()
+            lignes_entree = int(masque.sum())
+            masque = etape.fonction(df, masque)
+            filtre_en_attente = True
+            mesurer(etape.nom, debut, lignes_entree, int(masque.sum()))
+        else:
+            if filtre_en_attente:
+                materialiser()
+            debut = time.perf_counter()
+            resultat = etape.fonction(df)
+            if resultat is not None:
+                df = resultat
+            mesurer(etape.nom, debut, len(df), len(df))
+
+    if filtre_en_attente:
+        materialiser()
+
+    return df, pd.DataFrame(rapport)
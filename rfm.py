@@ -0,0 +1,93 @@
+from typing import Hashable
+
+import numpy as np
+import pandas as pd
+
+from cache_lru import CacheLRU
+from kpi import codes_entiers
+from temps import JOUR_NS
+
+# ===============================
+# Moteur RFM vectorisé
+# ===============================
+# Récence, fréquence et montant sont calculés par réductions natives (max,
+# comptes distincts, sommes) sur les codes entiers des clients, sans fonction
+# Python par client. Les scores sont des quartiles obtenus par searchsorted sur
+# les bornes de quantiles, et les segments sont lus dans une table indexée par
+# le score RFM.
+
+NB_QUARTILES = 4
+NIVEAUX_QUARTILES = np.linspace(0, 1, NB_QUARTILES + 1)[1:-1]
+
+# Segment par score RFM (3 à 12), bornes inchangées : >=10, >=8, >=6, >=4
+SEGMENTS = np.array(["Clients à Perdre"] * 4 + ["Clients à Risque"] * 2 + ["Clients Prometteurs"] * 2
+                    + ["Clients Fidèles"] * 2 + ["Champions"] * 3, dtype=object)
+
+
+def scores_quartiles(valeurs: np.ndarray, croissant: bool = True) -> np.ndarray:
+    # Équivalent de pd.qcut(valeurs, 4) : intervalles fermés à droite, bornes aux
+    # quantiles calculées comme pandas (mêmes arrondis aux bornes exactes)
+    bornes = pd.Series(valeurs).quantile(NIVEAUX_QUARTILES).to_numpy()
+    rangs = np.searchsorted(bornes, valeurs, side="left")
+    return (rangs + 1 if croissant else NB_QUARTILES - rangs).astype(np.int8)
+
+
+def rangs_ordinaux(valeurs: np.ndarray) -> np.ndarray:
+    # Équivalent de rank(method="first") : ex aequo départagés par ordre d'apparition
+    rangs = np.empty(len(valeurs), dtype=np.int64)
+    rangs[np.argsort(valeurs, kind="stable")] = np.arange(1, len(valeurs) + 1)
+    return rangs
+
+
+def agreger_clients(ventes: pd.DataFrame) -> pd.DataFrame:
+    clients = codes_entiers(ventes["CustomerID"])
+    connus = clients >= 0
+    clients = clients[connus]
+    instants = ventes.temps.instants[connus]
+    factures = codes_entiers(ventes["InvoiceNo"])[connus]
+    revenus = ventes["Revenue"].to_numpy(dtype=np.float64)[connus]
+
+    # Réductions natives groupées sur les codes entiers (sommes compensées comme
+    # un groupby classique), comptes distincts via les paires (client, facture)
+    groupes = pd.DataFrame({"DernierAchat": instants, "Monetary": revenus}).groupby(clients, sort=True)
+    agregats = groupes.agg({"DernierAchat": "max", "Monetary": "sum"})
+    _, premieres, clients = np.unique(clients, return_index=True, return_inverse=True)
+    base = int(factures.max()) + 1 if len(factures) else 1
+    frequence = np.bincount(np.unique(clients * base + factures) // base, minlength=len(premieres))
+
+    index = ventes["CustomerID"].to_numpy()[connus][premieres]
+    return pd.DataFrame({
+        "DernierAchat": agregats["DernierAchat"].to_numpy(),
+        "Frequency": frequence,
+        "Monetary": agregats["Monetary"].to_numpy(),
+    }, index=pd.Index(index, name="CustomerID"))
+
+
+def calculer_rfm(ventes: pd.DataFrame) -> pd.DataFrame:
+    rfm = agreger_clients(ventes)
+    if rfm.empty:
+        return rfm.drop(columns="DernierAchat").assign(Recency=np.empty(0, dtype=np.int64))
+    # Date de référence : lendemain de la dernière transaction, récence en jours entiers
+    reference = int(rfm["DernierAchat"].max()) + JOUR_NS
+    rfm.insert(0, "Recency", (reference - rfm.pop("DernierAchat").to_numpy()) // JOUR_NS)
+
+    if len(rfm) >= NB_QUARTILES:
+        attribuer_scores(rfm)
+    return rfm
+
+
+def attribuer_scores(rfm: pd.DataFrame) -> None:
+    rfm["R_Score"] = scores_quartiles(rfm["Recency"].to_numpy(), croissant=False)
+    rfm["F_Score"] = scores_quartiles(rangs_ordinaux(rfm["Frequency"].to_numpy()))
+    rfm["M_Score"] = scores_quartiles(rfm["Monetary"].to_numpy())
+    rfm["RFM_Score"] = rfm["R_Score"] + rfm["F_Score"] + rfm["M_Score"]
+    rfm["Segment"] = SEGMENTS[rfm["RFM_Score"].to_numpy()]
+
+
+class ServiceRFM:
+    def __init__(self, capacite: int = 32):
+        self._cache = CacheLRU(capacite)
+
+    def rfm(self, cle: Hashable, ventes: pd.DataFrame) -> pd.DataFrame:
+        # Un tableau RFM par état de filtre (période, pays)
+        return self._cache.obtenir(cle, lambda: calculer_rfm(ventes))
@@ -0,0 +1,175 @@
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# ===============================
+# Résumés de distribution (sketches)
+# ===============================
+# Un sketch ne garde que des compteurs par case : on y ajoute des valeurs par
+# lots et on en lit des quantiles sans trier les données.
+# HistogrammeEntiers est exact (une case par entier), SketchQuantiles garde une
+# erreur relative bornée sur les valeurs (cases logarithmiques, façon DDSketch)
+# et sert aussi de résumé en une passe (médianes d'un fichier lu par morceaux).
+# HyperLogLog (valeurs distinctes) et TopValeurs (valeurs fréquentes) complètent
+# les résumés en une passe de l'audit natif ; des registres HyperLogLog par
+# groupe (jour x pays du cube des ventes) se fusionnent pour tout filtre.
+
+
+class HistogrammeEntiers:
+    def __init__(self, compteurs: Dict[int, int] = None):
+        self.compteurs = dict(compteurs or {})
+
+    @property
+    def effectif(self) -> int:
+        return sum(self.compteurs.values())
+
+    def _cases(self, valeurs: np.ndarray) -> np.ndarray:
+        return np.asarray(valeurs, dtype=np.int64)
+
+    def _valeurs(self, cases: np.ndarray) -> np.ndarray:
+        return cases.astype(np.float64)
+
+    def ajouter(self, valeurs) -> None:
+        cases, nombres = np.unique(self._cases(valeurs), return_counts=True)
+        for case, nombre in zip(cases.tolist(), nombres.tolist()):
+            self.compteurs[case] = self.compteurs.get(case, 0) + nombre
+
+    def quantiles(self, niveaux: Sequence[float]) -> np.ndarray:
+        # Interpolation linéaire entre rangs, comme np.quantile / Series.quantile
+        if not self.compteurs:
+            return np.full(len(niveaux), np.nan)
+        cases = np.array(sorted(self.compteurs), dtype=np.int64)
+        cumul = np.cumsum([self.compteurs[c] for c in cases.tolist()])
+        valeurs = self._valeurs(cases)
+        positions = np.asarray(niveaux, dtype=np.float64) * (cumul[-1] - 1)
+        bas = np.floor(positions).astype(np.int64)
+        v_bas = valeurs[np.searchsorted(cumul, bas, side="right")]
+        v_haut = valeurs[np.searchsorted(cumul, np.minimum(bas + 1, cumul[-1] - 1), side="right")]
+        return v_bas + (positions - bas) * (v_haut - v_bas)
+
+
+class SketchQuantiles(HistogrammeEntiers):
+    # Valeur x > 0 : case i = ceil(log_gamma(x)), représentée par un point à erreur
+    # relative <= precision. Les valeurs négatives utilisent les cases de |x|,
+    # retournées et décalées sous la case de zéro, pour que l'ordre des cases
+    # reste celui des valeurs.
+    CASE_ZERO = -(1 << 61)
+    CASE_NEGATIVE = -(1 << 62)
+
+    def __init__(self, precision: float = 0.01, compteurs: Dict[int, int] = None):
+        super().__init__(compteurs)
+        self.precision = precision
+        self.gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(self.gamma)
+
+    def _cases(self, valeurs: np.ndarray) -> np.ndarray:
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        cases = np.full(len(valeurs), self.CASE_ZERO, dtype=np.int64)
+        non_nulles = valeurs != 0
+        log_abs = np.ceil(np.log(np.abs(valeurs[non_nulles])) / self._log_gamma).astype(np.int64)
+        cases[non_nulles] = np.where(valeurs[non_nulles] > 0, log_abs, self.CASE_NEGATIVE - log_abs)
+        return cases
+
+    def _valeurs(self, cases: np.ndarray) -> np.ndarray:
+        valeurs = np.zeros(len(cases), dtype=np.float64)
+        positives = cases > self.CASE_ZERO
+        negatives = cases < self.CASE_ZERO
+        valeurs[positives] = self._representant(cases[positives])
+        valeurs[negatives] = -self._representant(self.CASE_NEGATIVE - cases[negatives])
+        return valeurs
+
+    def _representant(self, cases: np.ndarray) -> np.ndarray:
+        # Milieu (au sens de l'erreur relative) de ]gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** cases.astype(np.float64) / (self.gamma + 1)
+
+
+def _longueur_binaire(valeurs: np.ndarray) -> np.ndarray:
+    # Nombre de bits significatifs d'entiers 64 bits (frexp est exact sur 32 bits)
+    haut = (valeurs >> np.uint64(32)).astype(np.float64)
+    bas = (valeurs & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(haut > 0, 32 + np.frexp(haut)[1], np.frexp(bas)[1])
+
+
+class HyperLogLog:
+    # Nombre de valeurs distinctes estimé à partir d'empreintes 64 bits, en 2^bits
+    # registres d'un octet (erreur relative typique 1,04 / sqrt(2^bits)). Deux
+    # sketches de mêmes paramètres se fusionnent registre par registre.
+    def __init__(self, bits: int = 12, registres: Sequence[int] = None):
+        self.bits = bits
+        self.nb_registres = 1 << bits
+        self.registres = (np.zeros(self.nb_registres, dtype=np.uint8) if registres is None
+                          else np.asarray(registres, dtype=np.uint8))
+
+    @property
+    def erreur_relative(self) -> float:
+        return 1.04 / math.sqrt(self.nb_registres)
+
+    def ajouter(self, empreintes: np.ndarray) -> None:
+        registres, rangs = rangs_hyperloglog(empreintes, self.bits)
+        np.maximum.at(self.registres, registres, rangs)
+
+    def fusionner(self, autre: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registres, autre.registres, out=self.registres)
+        return self
+
+    def estimation(self) -> float:
+        return float(estimations_hyperloglog(self.registres))
+
+
+def rangs_hyperloglog(empreintes: np.ndarray, bits: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Registre (bits de poids fort) et rang du premier bit à 1 dans les bits restants
+    empreintes = np.asarray(empreintes, dtype=np.uint64)
+    reste_bits = 64 - bits
+    registres = (empreintes >> np.uint64(reste_bits)).astype(np.intp)
+    reste = empreintes & np.uint64((1 << reste_bits) - 1)
+    return registres, (reste_bits + 1 - _longueur_binaire(reste)).astype(np.uint8)
+
+
+def registres_par_groupe(groupes: np.ndarray, empreintes: np.ndarray, nb_groupes: int,
+                         bits: int) -> np.ndarray:
+    # Un sketch HyperLogLog par groupe : tableau (groupes, 2^bits) de registres
+    registres, rangs = rangs_hyperloglog(empreintes, bits)
+    table = np.zeros(nb_groupes << bits, dtype=np.uint8)
+    np.maximum.at(table, (np.asarray(groupes, dtype=np.intp) << bits) + registres, rangs)
+    return table.reshape(nb_groupes, 1 << bits)
+
+
+def estimations_hyperloglog(registres: np.ndarray) -> np.ndarray:
+    # Estimation par sketch (dernier axe = registres)
+    m = registres.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimations = alpha * m * m / np.sum(np.ldexp(1.0, -registres.astype(np.int64)), axis=-1)
+    vides = np.count_nonzero(registres == 0, axis=-1)
+    # Petits effectifs : comptage linéaire des registres vides
+    lineaire = m * np.log(m / np.maximum(vides, 1))
+    return np.where((estimations <= 2.5 * m) & (vides > 0), lineaire, estimations)
+
+
+class TopValeurs:
+    # Valeurs les plus fréquentes, par lots de comptages : seuls les `capacite`
+    # plus grands compteurs sont gardés après chaque lot. Un compteur sous-estime
+    # la fréquence réelle d'au plus `erreur` (somme des compteurs écartés au seuil).
+    def __init__(self, capacite: int = 100, compteurs: Dict = None, erreur: int = 0):
+        self.capacite = capacite
+        self.compteurs = dict(compteurs or {})
+        self.erreur = erreur
+
+    def ajouter(self, valeurs: Sequence, nombres: np.ndarray) -> None:
+        nombres = np.asarray(nombres, dtype=np.int64)
+        positions = np.arange(len(nombres))
+        if len(nombres) > self.capacite:
+            ordre = np.argpartition(-nombres, self.capacite)
+            positions = ordre[:self.capacite]
+            self.erreur += int(nombres[ordre[self.capacite]])
+        for position in positions.tolist():
+            valeur = valeurs[position]
+            self.compteurs[valeur] = self.compteurs.get(valeur, 0) + int(nombres[position])
+
+        if len(self.compteurs) > self.capacite:
+            tries = sorted(self.compteurs.items(), key=lambda vn: vn[1], reverse=True)
+            self.erreur += tries[self.capacite][1]
+            self.compteurs = dict(tries[:self.capacite])
+
+    def plus_frequentes(self, k: int) -> List[Tuple[object, int]]:
+        return sorted(self.compteurs.items(), key=lambda vn: vn[1], reverse=True)[:k]
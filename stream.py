@@ -3,6 +3,11 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
+from cache_donnees import charger_donnees_brutes
+from pipeline_nettoyage import ETAPES_BASE, executer_pipeline
+from kpi import calculer_kpis, types_transactions
+from pareto import AnalysePareto, revenus_par_produit
+
 # === 1. Configuration ===
 st.set_page_config(page_title="Analyse Online Retail", layout="wide")
 st.title("📊 Analyse du jeu de données Online Retail")
@@ -10,22 +15,26 @@ st.title("📊 Analyse du jeu de données Online Retail")
 # === 2. Chargement des données ===
 @st.cache_data
 def load_data():
-    df = pd.read_excel("Online Retail.xlsx")
-    df = df.dropna(subset=["CustomerID"])
-    df = df[df["UnitPrice"] > 0]
-    df["Revenue"] = df["Quantity"] * df["UnitPrice"]
+    df, _ = executer_pipeline(charger_donnees_brutes(), ETAPES_BASE)
     return df
 
+# CA par produit agrégé une seule fois ; les top-k sont lus par argpartition
+@st.cache_resource
+def load_pareto():
+    df = load_data()
+    return AnalysePareto(*revenus_par_produit(df[df["Quantity"] > 0]))
+
 df = load_data()
 
 ventes = df[df["Quantity"] > 0]
-retours = df[df["Quantity"] < 0]
 
 # === 3. KPIs de base ===
-total_revenue = ventes["Revenue"].sum()
-nb_orders = ventes["InvoiceNo"].nunique()
-nb_customers = df["CustomerID"].nunique()
-avg_basket = total_revenue / nb_orders
+# Un seul passage : ici les retours regroupent toutes les quantités négatives
+kpis = calculer_kpis(df, types_transactions(df, annulations_separees=False))
+total_revenue = kpis.ca_total
+nb_orders = kpis.nb_commandes
+nb_customers = kpis.nb_clients_total
+avg_basket = kpis.panier_moyen
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("CA total", f"{total_revenue:,.0f} £")
@@ -38,19 +47,17 @@ st.markdown("---")
 # === 4. Analyse Pareto ===
 st.subheader("📈 Analyse de Pareto (Produits)")
 
-pareto_df = ventes.groupby("Description")["Revenue"].sum().reset_index()
-pareto_df = pareto_df.sort_values("Revenue", ascending=False)
-pareto_df["cumperc"] = pareto_df["Revenue"].cumsum() / pareto_df["Revenue"].sum() * 100
+pareto_df = load_pareto().top(30)
 
 fig_pareto = go.Figure()
 fig_pareto.add_trace(go.Bar(
-    x=pareto_df["Description"].head(30),
-    y=pareto_df["Revenue"].head(30),
+    x=pareto_df["Description"],
+    y=pareto_df["Revenue"],
     name="CA par produit"
 ))
 fig_pareto.add_trace(go.Scatter(
-    x=pareto_df["Description"].head(30),
-    y=pareto_df["cumperc"].head(30),
+    x=pareto_df["Description"],
+    y=pareto_df["cumperc"],
     mode="lines+markers",
     name="% cumulé",
     yaxis="y2"
@@ -69,7 +76,7 @@ st.markdown("---")
 # === 5. CA par pays ===
 st.subheader("🌍 CA par pays")
 
-country_df = ventes.groupby("Country")["Revenue"].sum().reset_index()
+country_df = ventes.groupby("Country", observed=True)["Revenue"].sum().reset_index()
 country_df = country_df.sort_values("Revenue", ascending=False).reset_index(drop=True)
 
 # Catégories
@@ -125,16 +132,16 @@ st.markdown("---")
 # === 6. Taux de retours ===
 st.subheader("🔄 Taux de retours")
 
-ca_total = ventes["Revenue"].sum()
-ca_retours = abs(retours["Revenue"].sum())
+ca_total = kpis.ca_total
+ca_retours = kpis.ca_retours
 taux_retours_ca = (ca_retours / ca_total) * 100
 
-nb_commandes_total = df["InvoiceNo"].nunique()
-nb_commandes_retours = retours["InvoiceNo"].nunique()
+nb_commandes_total = kpis.nb_commandes_total
+nb_commandes_retours = kpis.nb_retours
 taux_retours_cmd = (nb_commandes_retours / nb_commandes_total) * 100
 
-nb_clients_total = df["CustomerID"].nunique()
-nb_clients_retours = retours["CustomerID"].nunique()
+nb_clients_total = kpis.nb_clients_total
+nb_clients_retours = kpis.nb_clients_retours
 taux_retours_clients = (nb_clients_retours / nb_clients_total) * 100
 
 col1, col2, col3 = st.columns(3)
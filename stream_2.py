@@ -3,6 +3,12 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
+from cache_donnees import charger_donnees_brutes
+from pipeline_nettoyage import ETAPES_BASE, executer_pipeline
+from kpi import calculer_kpis, types_transactions
+from pareto import AnalysePareto, revenus_par_produit
+from cube_ventes import top_produits_par_pays
+
 # === 1. Configuration ===
 st.set_page_config(page_title="Analyse Online Retail", layout="wide")
 st.title("📊 Analyse du jeu de données Online Retail")
@@ -10,22 +16,32 @@ st.title("📊 Analyse du jeu de données Online Retail")
 # === 2. Chargement des données ===
 @st.cache_data
 def load_data():
-    df = pd.read_excel("Online Retail.xlsx")
-    df = df.dropna(subset=["CustomerID"])
-    df = df[df["UnitPrice"] > 0]
-    df["Revenue"] = df["Quantity"] * df["UnitPrice"]
+    df, _ = executer_pipeline(charger_donnees_brutes(), ETAPES_BASE)
     return df
 
+# CA par produit agrégé une seule fois ; les top-k sont lus par argpartition
+@st.cache_resource
+def load_pareto():
+    df = load_data()
+    return AnalysePareto(*revenus_par_produit(df[df["Quantity"] > 0]))
+
+# Top 10 produits de tous les pays, en une seule agrégation (pays, produit)
+@st.cache_resource
+def load_top_produits():
+    df = load_data()
+    return top_produits_par_pays(df[df["Quantity"] > 0], 10)
+
 df = load_data()
 
 ventes = df[df["Quantity"] > 0]
-retours = df[df["Quantity"] < 0]
 
 # === 3. KPIs de base ===
-total_revenue = ventes["Revenue"].sum()
-nb_orders = ventes["InvoiceNo"].nunique()
-nb_customers = df["CustomerID"].nunique()
-avg_basket = total_revenue / nb_orders
+# Un seul passage : ici les retours regroupent toutes les quantités négatives
+kpis = calculer_kpis(df, types_transactions(df, annulations_separees=False))
+total_revenue = kpis.ca_total
+nb_orders = kpis.nb_commandes
+nb_customers = kpis.nb_clients_total
+avg_basket = kpis.panier_moyen
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("CA total", f"{total_revenue:,.0f} £")
@@ -38,19 +54,17 @@ st.markdown("---")
 # === 4. Analyse Pareto ===
 st.subheader("📈 Analyse de Pareto (Produits)")
 
-pareto_df = ventes.groupby("Description")["Revenue"].sum().reset_index()
-pareto_df = pareto_df.sort_values("Revenue", ascending=False)
-pareto_df["cumperc"] = pareto_df["Revenue"].cumsum() / pareto_df["Revenue"].sum() * 100
+pareto_df = load_pareto().top(30)
 
 fig_pareto = go.Figure()
 fig_pareto.add_trace(go.Bar(
-    x=pareto_df["Description"].head(30),
-    y=pareto_df["Revenue"].head(30),
+    x=pareto_df["Description"],
+    y=pareto_df["Revenue"],
     name="CA par produit"
 ))
 fig_pareto.add_trace(go.Scatter(
-    x=pareto_df["Description"].head(30),
-    y=pareto_df["cumperc"].head(30),
+    x=pareto_df["Description"],
+    y=pareto_df["cumperc"],
     mode="lines+markers",
     name="% cumulé",
     yaxis="y2"
@@ -69,7 +83,7 @@ st.markdown("---")
 # === 5. CA par pays ===
 st.subheader("🌍 CA par pays")
 
-country_df = ventes.groupby("Country")["Revenue"].sum().reset_index()
+country_df = ventes.groupby("Country", observed=True)["Revenue"].sum().reset_index()
 country_df = country_df.sort_values("Revenue", ascending=False).reset_index(drop=True)
 
 # Catégories pour la carte
@@ -128,9 +142,7 @@ st.subheader("🛒 Top 10 produits par pays")
 # Sélecteur pays
 selected_country = st.selectbox("Sélectionner un pays :", country_df["Country"].unique())
 
-top_products_country = ventes[ventes["Country"] == selected_country] \
-    .groupby("Description")["Revenue"].sum().reset_index() \
-    .sort_values("Revenue", ascending=False).head(10)
+top_products_country = load_top_produits()[str(selected_country)]
 
 fig_top_products = px.bar(
     top_products_country,
@@ -146,16 +158,16 @@ st.markdown("---")
 # === 7. Taux de retours ===
 st.subheader("🔄 Taux de retours")
 
-ca_total = ventes["Revenue"].sum()
-ca_retours = abs(retours["Revenue"].sum())
+ca_total = kpis.ca_total
+ca_retours = kpis.ca_retours
 taux_retours_ca = (ca_retours / ca_total) * 100
 
-nb_commandes_total = df["InvoiceNo"].nunique()
-nb_commandes_retours = retours["InvoiceNo"].nunique()
+nb_commandes_total = kpis.nb_commandes_total
+nb_commandes_retours = kpis.nb_retours
 taux_retours_cmd = (nb_commandes_retours / nb_commandes_total) * 100
 
-nb_clients_total = df["CustomerID"].nunique()
-nb_clients_retours = retours["CustomerID"].nunique()
+nb_clients_total = kpis.nb_clients_total
+nb_clients_retours = kpis.nb_clients_retours
 taux_retours_clients = (nb_clients_retours / nb_clients_total) * 100
 
 col1, col2, col3 = st.columns(3)
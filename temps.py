@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# ===============================
+# Attributs temporels paresseux et libellés
+# ===============================
+# Les composantes de date (année, mois, jour, jour de la semaine, heure, semaine
+# ISO) ne sont plus matérialisées au chargement. L'accesseur df.temps les calcule
+# à la première lecture, par arithmétique entière sur les instants epoch
+# (int64, nanosecondes), sans strftime ni création de chaînes, puis les garde en
+# cache sur le DataFrame. Les libellés ne sont produits qu'à l'affichage.
+
+NOMS_MOIS = np.array(['January', 'February', 'March', 'April', 'May', 'June',
+                      'July', 'August', 'September', 'October', 'November', 'December'])
+NOMS_JOURS = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+
+HEURE_NS = 3_600 * 10**9
+JOUR_NS = 24 * HEURE_NS
+
+
+def libelles_mois(mois) -> np.ndarray:
+    return NOMS_MOIS[np.asarray(mois, dtype=np.int64) - 1]
+
+
+def libelles_jours(jours) -> np.ndarray:
+    return NOMS_JOURS[np.asarray(jours, dtype=np.int64)]
+
+
+# === Calendrier civil en arithmétique entière (algorithme de H. Hinnant) ===
+def civil_depuis_jours(jours: np.ndarray):
+    z = jours + 719_468
+    ere = np.floor_divide(z, 146_097)
+    jour_ere = z - ere * 146_097
+    annee_ere = (jour_ere - jour_ere // 1_460 + jour_ere // 36_524 - jour_ere // 146_096) // 365
+    jour_annee = jour_ere - (365 * annee_ere + annee_ere // 4 - annee_ere // 100)
+    mois_decale = (5 * jour_annee + 2) // 153
+    jour = jour_annee - (153 * mois_decale + 2) // 5 + 1
+    mois = np.where(mois_decale < 10, mois_decale + 3, mois_decale - 9)
+    annee = annee_ere + ere * 400 + (mois <= 2)
+    return annee, mois, jour
+
+
+def jours_depuis_civil(annee: np.ndarray, mois: np.ndarray, jour: np.ndarray) -> np.ndarray:
+    annee = annee - (mois <= 2)
+    ere = np.floor_divide(annee, 400)
+    annee_ere = annee - ere * 400
+    jour_annee = (153 * np.where(mois > 2, mois - 3, mois + 9) + 2) // 5 + jour - 1
+    jour_ere = annee_ere * 365 + annee_ere // 4 - annee_ere // 100 + jour_annee
+    return ere * 146_097 + jour_ere - 719_468
+
+
+@pd.api.extensions.register_dataframe_accessor("temps")
+class AccesseurTemps:
+    colonne = "InvoiceDate"
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        # Cache porté par le DataFrame lui-même : pandas 3 recrée l'accesseur à
+        # chaque lecture de df.temps. Attribut hors _metadata, donc non transmis
+        # aux tranches et copies, qui recalculent leurs propres composantes.
+        if "_cache_temps" not in df.__dict__:
+            object.__setattr__(df, "_cache_temps", {})
+        self._cache = df.__dict__["_cache_temps"]
+
+    def _calculer(self, nom: str, calcul):
+        if nom not in self._cache:
+            self._cache[nom] = calcul()
+        return self._cache[nom]
+
+    @property
+    def instants(self) -> np.ndarray:
+        return self._calculer("instants", lambda: self._df[self.colonne].to_numpy()
+                              .astype("datetime64[ns]").view(np.int64))
+
+    @property
+    def jours_epoch(self) -> np.ndarray:
+        return self._calculer("jours_epoch", lambda: np.floor_divide(self.instants, JOUR_NS))
+
+    def _civil(self):
+        return self._calculer("civil", lambda: civil_depuis_jours(self.jours_epoch))
+
+    @property
+    def annee(self) -> np.ndarray:
+        return self._calculer("annee", lambda: self._civil()[0].astype(np.int16))
+
+    @property
+    def mois(self) -> np.ndarray:
+        return self._calculer("mois", lambda: self._civil()[1].astype(np.int8))
+
+    @property
+    def jour(self) -> np.ndarray:
+        return self._calculer("jour", lambda: self._civil()[2].astype(np.int8))
+
+    @property
+    def jour_semaine(self) -> np.ndarray:
+        # 0 = lundi (le 1er janvier 1970 était un jeudi)
+        return self._calculer("jour_semaine", lambda: ((self.jours_epoch + 3) % 7).astype(np.int8))
+
+    @property
+    def heure(self) -> np.ndarray:
+        return self._calculer("heure", lambda: (np.floor_divide(self.instants, HEURE_NS) % 24).astype(np.int8))
+
+    @property
+    def semaine(self) -> np.ndarray:
+        # Semaine ISO 8601 : celle qui contient le jeudi de la semaine courante
+        def calcul():
+            jeudi = self.jours_epoch - self.jour_semaine + 3
+            annee_iso = civil_depuis_jours(jeudi)[0]
+            debut = jours_depuis_civil(annee_iso, np.ones_like(annee_iso), np.ones_like(annee_iso))
+            return ((jeudi - debut) // 7 + 1).astype(np.int8)
+        return self._calculer("semaine", calcul)
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Modules du dépôt importés à plat, comme par les tableaux de bord
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAYS = ["United Kingdom", "France", "Germany", "EIRE", "Spain"]
+
+
+def generer_transactions(nb_lignes: int = 3000, nb_factures: int = 400, graine: int = 0) -> pd.DataFrame:
+    # Échantillon fixe au format nettoyé de visual.py : une facture = un client,
+    # un pays, une date ; annulations (préfixe C), retours (quantité négative
+    # sans C), clients inconnus, colonnes catégorielles, trié par date
+    rng = np.random.default_rng(graine)
+    factures = rng.integers(0, nb_factures, nb_lignes)
+
+    numeros = np.array([("C" if f % 17 == 0 else "") + str(536000 + f) for f in range(nb_factures)])
+    clients = rng.integers(12000, 12250, nb_factures).astype(np.float64)
+    clients[rng.random(nb_factures) < 0.05] = np.nan
+    pays = rng.choice(PAYS, nb_factures, p=[0.6, 0.15, 0.1, 0.1, 0.05])
+    dates = (pd.Timestamp("2010-12-01 08:00")
+             + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, nb_factures), unit="min"))
+
+    quantites = rng.integers(1, 25, nb_lignes)
+    negatives = (factures % 17 == 0) | (factures % 23 == 0)
+    quantites[negatives] = -quantites[negatives]
+
+    df = pd.DataFrame({
+        "InvoiceNo": numeros[factures],
+        "Description": [f"PRODUIT {p}" for p in rng.zipf(1.3, nb_lignes) % 150],
+        "Quantity": quantites,
+        "InvoiceDate": dates[factures],
+        "UnitPrice": rng.uniform(0.3, 12.0, nb_lignes).round(2),
+        "CustomerID": clients[factures],
+        "Country": pays[factures],
+    })
+    df["Is_Cancellation"] = df["InvoiceNo"].str.startswith("C").to_numpy()
+    df["Revenue"] = df["Quantity"] * df["UnitPrice"]
+    for col in ["InvoiceNo", "Description", "Country"]:
+        df[col] = df[col].astype("category")
+    return df.sort_values("InvoiceDate", kind="stable", ignore_index=True)
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    return generer_transactions()
+
+
+@pytest.fixture
+def ventes(transactions: pd.DataFrame) -> pd.DataFrame:
+    # Partition des ventes : clients connus, quantités positives, hors annulations
+    masque = (transactions["CustomerID"].notna() & (transactions["Quantity"] > 0)
+              & ~transactions["Is_Cancellation"])
+    return transactions[masque].reset_index(drop=True)
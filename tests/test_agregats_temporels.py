@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from agregats_temporels import agreger_temps
+
+
+def par_mois_pandas(ventes: pd.DataFrame) -> pd.DataFrame:
+    dates = ventes["InvoiceDate"]
+    return (ventes.groupby([dates.dt.year.rename("Year"), dates.dt.month.rename("Month")], observed=True)
+                  .agg(Revenue=("Revenue", "sum"), InvoiceNo=("InvoiceNo", "nunique"),
+                       CustomerID=("CustomerID", "nunique"))
+                  .reset_index())
+
+
+def test_par_mois_egal_pandas(ventes):
+    resultat = agreger_temps(ventes).par_mois()
+    pd.testing.assert_frame_equal(resultat, par_mois_pandas(ventes), check_dtype=False)
+
+
+def test_facture_sur_deux_heures(ventes):
+    # Lignes d'une même facture à des heures différentes : comptée une fois dans son mois
+    ventes = ventes.copy()
+    decalees = np.arange(len(ventes)) % 2 == 1
+    ventes.loc[decalees, "InvoiceDate"] += pd.Timedelta(minutes=59)
+    resultat = agreger_temps(ventes).par_mois()
+    pd.testing.assert_frame_equal(resultat, par_mois_pandas(ventes), check_dtype=False)
+
+
+def test_sans_comptage_clients(ventes):
+    exact = agreger_temps(ventes).par_mois()
+    sans_clients = agreger_temps(ventes, compter_clients=False).par_mois()
+    assert (sans_clients["CustomerID"] == 0).all()
+    pd.testing.assert_frame_equal(sans_clients.drop(columns="CustomerID"), exact.drop(columns="CustomerID"))
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etat_rfm import EtatRFM, mettre_a_jour_etat_rfm
+from rfm import calculer_rfm
+from sketches import HistogrammeEntiers, SketchQuantiles
+
+
+def comparer_scores(etat: EtatRFM, ventes: pd.DataFrame) -> None:
+    attendu = calculer_rfm(ventes)
+    pd.testing.assert_frame_equal(etat.scores(), attendu, check_dtype=False, check_index_type=False)
+
+
+def decouper_par_date(ventes: pd.DataFrame, nb_lots: int):
+    # Lots chronologiques comme ceux de l'ingestion : une date n'est jamais
+    # partagée entre deux lots (sinon le second lot serait tardif)
+    instants = ventes["InvoiceDate"].to_numpy()
+    coupures = np.searchsorted(instants, instants[np.arange(1, nb_lots) * len(ventes) // nb_lots])
+    return np.split(np.arange(len(ventes)), coupures)
+
+
+def test_fusion_par_lots_egal_calcul_complet(ventes):
+    etat = EtatRFM()
+    for lot in decouper_par_date(ventes, 4):
+        lot = ventes.iloc[lot]
+        assert not etat.est_tardif(lot)
+        etat.fusionner(lot)
+    comparer_scores(etat, ventes)
+
+
+def test_scores_memorises_jusqu_a_la_fusion(ventes):
+    premier, second = (ventes.iloc[lot] for lot in decouper_par_date(ventes, 2))
+    etat = EtatRFM()
+    etat.fusionner(premier)
+    assert etat.scores() is etat.scores()
+    etat.fusionner(second)
+    comparer_scores(etat, ventes)
+
+
+def test_lot_tardif_detecte(ventes):
+    etat = EtatRFM()
+    etat.fusionner(ventes.iloc[len(ventes) // 2:])
+    assert etat.est_tardif(ventes.iloc[:10])
+
+
+def test_mise_a_jour_incrementale(ventes, tmp_path):
+    lots = decouper_par_date(ventes, 3)
+    appels = []
+
+    def ventes_depuis(i):
+        appels.append(i)
+        return ventes.iloc[np.concatenate(lots[i:nb_lots])]
+
+    for nb_lots in [1, 3]:
+        etat = mettre_a_jour_etat_rfm([f"lot{i}" for i in range(nb_lots)], ventes_depuis, "v1", str(tmp_path))
+    assert appels == [0, 1]
+    comparer_scores(etat, ventes)
+
+    # État à jour : rien n'est relu ; règles modifiées : reconstruction complète
+    mettre_a_jour_etat_rfm(["lot0", "lot1", "lot2"], ventes_depuis, "v1", str(tmp_path))
+    etat = mettre_a_jour_etat_rfm(["lot0", "lot1", "lot2"], ventes_depuis, "v2", str(tmp_path))
+    assert appels == [0, 1, 0]
+    comparer_scores(etat, ventes)
+
+
+def test_lot_tardif_reconstruit(ventes, tmp_path):
+    anciens, recents = (ventes.iloc[lot] for lot in decouper_par_date(ventes, 2))
+    mettre_a_jour_etat_rfm(["recents"], lambda i: recents, "v1", str(tmp_path))
+    etat = mettre_a_jour_etat_rfm(["recents", "anciens"],
+                                  lambda i: anciens if i == 1 else pd.concat([recents, anciens]),
+                                  "v1", str(tmp_path))
+    comparer_scores(etat, ventes)
+
+
+def test_histogramme_entiers_exact():
+    valeurs = np.random.default_rng(4).integers(0, 100, 1001)
+    histogramme = HistogrammeEntiers()
+    histogramme.ajouter(valeurs[:600])
+    histogramme.ajouter(valeurs[600:])
+    np.testing.assert_allclose(histogramme.quantiles([0.1, 0.25, 0.5, 0.9]),
+                               np.quantile(valeurs, [0.1, 0.25, 0.5, 0.9]))
+
+
+@pytest.mark.parametrize("signe", [1, -1])
+def test_sketch_quantiles_erreur_relative(signe):
+    valeurs = signe * np.random.default_rng(5).lognormal(5, 2, 10_001)
+    sketch = SketchQuantiles(precision=0.01)
+    for morceau in np.array_split(valeurs, 7):
+        sketch.ajouter(morceau)
+    niveaux = [0.01, 0.25, 0.5, 0.75, 0.99]
+    np.testing.assert_allclose(sketch.quantiles(niveaux), np.quantile(valeurs, niveaux), rtol=0.01)
@@ -0,0 +1,69 @@
+from dataclasses import asdict
+
+import pandas as pd
+import pytest
+
+from kpi import calculer_kpis, calculer_kpis_partitions
+
+
+def kpis_pandas(df: pd.DataFrame) -> dict:
+    # Mêmes métriques en pandas classique (masques booléens, nunique, sum)
+    annulations = df[df["Is_Cancellation"]]
+    ventes = df[~df["Is_Cancellation"] & (df["Quantity"] > 0)]
+    retours = df[~df["Is_Cancellation"] & (df["Quantity"] < 0)]
+    ca_total = ventes["Revenue"].sum()
+    nb_commandes = ventes["InvoiceNo"].nunique()
+    return {
+        "ca_total": ca_total,
+        "nb_commandes": nb_commandes,
+        "nb_clients": ventes["CustomerID"].nunique(),
+        "panier_moyen": ca_total / nb_commandes,
+        "nb_annulations": annulations["InvoiceNo"].nunique(),
+        "produits_annules": abs(annulations["Quantity"].sum()),
+        "valeur_annulations": abs(annulations["Revenue"].sum()),
+        "ca_retours": abs(retours["Revenue"].sum()),
+        "nb_retours": retours["InvoiceNo"].nunique(),
+        "nb_clients_retours": retours["CustomerID"].nunique(),
+        "nb_commandes_total": df["InvoiceNo"].nunique(),
+        "nb_clients_total": df["CustomerID"].nunique(),
+    }
+
+
+def partitions(df: pd.DataFrame):
+    return (df[~df["Is_Cancellation"] & (df["Quantity"] > 0)],
+            df[df["Is_Cancellation"]],
+            df[~df["Is_Cancellation"] & (df["Quantity"] < 0)])
+
+
+def test_noyau_egal_pandas(transactions):
+    assert asdict(calculer_kpis(transactions)) == pytest.approx(kpis_pandas(transactions))
+
+
+def test_partitions_egal_pandas(transactions):
+    kpis = calculer_kpis_partitions(*partitions(transactions))
+    assert asdict(kpis) == pytest.approx(kpis_pandas(transactions))
+
+
+def test_partitions_vocabulaires_differents(transactions):
+    # Partitions nettoyées séparément : catégories différentes, ou texte brut
+    morceaux = [m.astype({"InvoiceNo": str}) for m in partitions(transactions)]
+    morceaux[0] = morceaux[0].astype({"InvoiceNo": "category"})
+    kpis = calculer_kpis_partitions(*morceaux)
+    assert asdict(kpis) == pytest.approx(kpis_pandas(transactions))
+
+
+def test_sans_comptage_clients(transactions):
+    kpis = calculer_kpis_partitions(*partitions(transactions), compter_clients=False)
+    assert kpis.nb_clients == kpis.nb_clients_retours == kpis.nb_clients_total == 0
+    assert kpis.nb_commandes == transactions.loc[
+        ~transactions["Is_Cancellation"] & (transactions["Quantity"] > 0), "InvoiceNo"].nunique()
+
+
+def test_partitions_categories_dans_un_autre_ordre(transactions):
+    # Mêmes catégories dans un ordre différent selon la partition : dtypes égaux, codes différents
+    morceaux = list(partitions(transactions))
+    categories = morceaux[0]["InvoiceNo"].cat.categories
+    morceaux[1] = morceaux[1].assign(InvoiceNo=morceaux[1]["InvoiceNo"].cat.reorder_categories(categories[::-1]))
+    assert morceaux[1]["InvoiceNo"].dtype == morceaux[0]["InvoiceNo"].dtype
+    kpis = calculer_kpis_partitions(*morceaux)
+    assert asdict(kpis) == pytest.approx(kpis_pandas(transactions))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from pareto import AnalysePareto, lttb, revenus_par_produit
+
+
+def ca_pandas(ventes: pd.DataFrame) -> pd.Series:
+    return (ventes.groupby("Description", observed=True)["Revenue"].sum()
+                  .sort_values(ascending=False, kind="stable"))
+
+
+def test_top_egal_tri_complet(ventes):
+    pareto = AnalysePareto(*revenus_par_produit(ventes))
+    attendu = ca_pandas(ventes)
+    for k in [1, 10, 25, len(attendu)]:
+        top = pareto.top(k)
+        assert list(top["Description"]) == list(attendu.index[:k])
+        np.testing.assert_allclose(top["Revenue"], attendu.to_numpy()[:k])
+        np.testing.assert_allclose(top["cumperc"], attendu.cumsum().to_numpy()[:k] / attendu.sum() * 100)
+        np.testing.assert_allclose(pareto.ca_top(k), attendu.iloc[:k].sum())
+
+
+def test_nb_produits_pour(ventes):
+    pareto = AnalysePareto(*revenus_par_produit(ventes))
+    cumul = ca_pandas(ventes).cumsum()
+    for part in [0.5, 0.8, 0.95, 1.0]:
+        attendu = int((cumul < part * cumul.iloc[-1]).sum()) + 1
+        assert pareto.nb_produits_pour(part) == min(attendu, len(cumul))
+
+
+def test_rendu_borne_et_seuil_80(ventes):
+    pareto = AnalysePareto(*revenus_par_produit(ventes))
+    barres, courbe = pareto.rendu(budget=40)
+    np.testing.assert_allclose(barres["CA"].sum(), pareto.total)
+    assert barres["Nb produits"].sum() == pareto.nb_produits
+    assert len(courbe) <= 40
+    assert pareto.nb_produits_pour(0.8) in set(courbe["Rang"])
+
+
+def lttb_reference(x, y, nb_points):
+    # Algorithme de Steinarsson écrit point par point
+    n = len(x)
+    pas = (n - 2) / (nb_points - 2)
+    gardes, retenu = [0], 0
+    for i in range(nb_points - 2):
+        debut_suivant = int((i + 1) * pas) + 1
+        fin_suivant = min(int((i + 2) * pas) + 1, n)
+        moyenne_x = sum(x[debut_suivant:fin_suivant]) / (fin_suivant - debut_suivant)
+        moyenne_y = sum(y[debut_suivant:fin_suivant]) / (fin_suivant - debut_suivant)
+        meilleure_aire, meilleur = -1.0, None
+        for j in range(int(i * pas) + 1, int((i + 1) * pas) + 1):
+            aire = abs((x[retenu] - moyenne_x) * (y[j] - y[retenu])
+                       - (x[retenu] - x[j]) * (moyenne_y - y[retenu]))
+            if aire > meilleure_aire:
+                meilleure_aire, meilleur = aire, j
+        gardes.append(meilleur)
+        retenu = meilleur
+    return gardes + [n - 1]
+
+
+def test_lttb_egal_reference():
+    rng = np.random.default_rng(1)
+    x = np.arange(500, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=500))
+    for nb_points in [3, 10, 37, 100]:
+        assert list(lttb(x, y, nb_points)) == lttb_reference(x.tolist(), y.tolist(), nb_points)
+    assert list(lttb(x, y, 1000)) == list(range(500))
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from rfm import SEGMENTS, calculer_rfm, rangs_ordinaux, scores_quartiles
+
+
+def rfm_pandas(ventes: pd.DataFrame) -> pd.DataFrame:
+    # Version groupby / qcut du calcul RFM d'origine
+    reference = ventes["InvoiceDate"].max() + pd.Timedelta(days=1)
+    rfm = ventes.groupby("CustomerID").agg(
+        Recency=("InvoiceDate", lambda d: (reference - d.max()).days),
+        Frequency=("InvoiceNo", "nunique"),
+        Monetary=("Revenue", "sum"),
+    )
+    rfm["R_Score"] = pd.qcut(rfm["Recency"], 4, labels=[4, 3, 2, 1]).astype(int)
+    rfm["F_Score"] = pd.qcut(rfm["Frequency"].rank(method="first"), 4, labels=[1, 2, 3, 4]).astype(int)
+    rfm["M_Score"] = pd.qcut(rfm["Monetary"], 4, labels=[1, 2, 3, 4]).astype(int)
+    rfm["RFM_Score"] = rfm["R_Score"] + rfm["F_Score"] + rfm["M_Score"]
+    return rfm
+
+
+def test_scores_quartiles_egal_qcut():
+    rng = np.random.default_rng(2)
+    # Valeurs continues, puis entières avec ex aequo sur les bornes
+    for valeurs in [rng.lognormal(3, 1, 1001), rng.integers(0, 40, 500).astype(float)]:
+        attendu = pd.qcut(valeurs, 4, labels=[1, 2, 3, 4]).astype(int)
+        np.testing.assert_array_equal(scores_quartiles(valeurs), attendu)
+        np.testing.assert_array_equal(scores_quartiles(valeurs, croissant=False), 5 - attendu)
+
+
+def test_rangs_ordinaux_egal_rank_first():
+    valeurs = np.random.default_rng(3).integers(0, 10, 300)
+    np.testing.assert_array_equal(rangs_ordinaux(valeurs), pd.Series(valeurs).rank(method="first").astype(int))
+
+
+def test_calculer_rfm_egal_pandas(ventes):
+    rfm = calculer_rfm(ventes)
+    attendu = rfm_pandas(ventes)
+    pd.testing.assert_frame_equal(rfm[attendu.columns], attendu, check_dtype=False)
+    np.testing.assert_array_equal(rfm["Segment"], SEGMENTS[attendu["RFM_Score"].to_numpy()])
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube_ventes import BITS_CLIENTS, clients_approches, clients_approches_par_mois, construire_cube
+from sketches import HyperLogLog
+
+# Écart toléré : 4 écarts-types de l'estimateur (échantillons fixes, pas d'aléa entre exécutions)
+NB_ECARTS = 4
+
+
+def empreintes(valeurs) -> np.ndarray:
+    return pd.util.hash_pandas_object(pd.Series(valeurs), index=False).to_numpy()
+
+
+@pytest.mark.parametrize("nb_distincts", [50, 2_000, 200_000])
+def test_hyperloglog_dans_la_borne(nb_distincts):
+    valeurs = np.random.default_rng(6).integers(0, nb_distincts, 3 * nb_distincts)
+    sketch = HyperLogLog()
+    sketch.ajouter(empreintes(valeurs))
+    exact = len(np.unique(valeurs))
+    assert sketch.estimation() == pytest.approx(exact, rel=NB_ECARTS * sketch.erreur_relative)
+
+
+def test_hyperloglog_fusion_egal_union():
+    a, b = np.arange(0, 30_000), np.arange(20_000, 50_000)
+    gauche, droite, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    gauche.ajouter(empreintes(a))
+    droite.ajouter(empreintes(b))
+    union.ajouter(empreintes(np.concatenate([a, b])))
+    np.testing.assert_array_equal(gauche.fusionner(droite).registres, union.registres)
+
+
+def test_clients_approches_egal_nunique(ventes):
+    cube = construire_cube(ventes)
+    debut, fin = pd.Timestamp("2011-02-01"), pd.Timestamp("2011-08-31")
+    for pays in [["United Kingdom"], ["France", "Germany", "EIRE"]]:
+        sketch = clients_approches(cube, debut, fin, pays)
+        selection = ventes[ventes["InvoiceDate"].between(debut, fin + pd.Timedelta(days=1), inclusive="left")
+                           & ventes["Country"].isin(pays)]
+        assert sketch.estimation() == pytest.approx(selection["CustomerID"].nunique(),
+                                                    rel=NB_ECARTS * sketch.erreur_relative)
+
+
+def test_clients_approches_par_mois_egal_nunique(ventes):
+    cube = construire_cube(ventes)
+    pays = ["United Kingdom", "France"]
+    par_mois = clients_approches_par_mois(cube, ventes["InvoiceDate"].min(), ventes["InvoiceDate"].max(), pays)
+    selection = ventes[ventes["Country"].isin(pays)]
+    attendu = (selection.groupby([selection["InvoiceDate"].dt.year.rename("Year"),
+                                  selection["InvoiceDate"].dt.month.rename("Month")])["CustomerID"]
+                        .nunique().reset_index())
+    pd.testing.assert_frame_equal(par_mois[["Year", "Month"]], attendu[["Year", "Month"]], check_dtype=False)
+    np.testing.assert_allclose(par_mois["CustomerID"], attendu["CustomerID"],
+                               rtol=NB_ECARTS * HyperLogLog(BITS_CLIENTS).erreur_relative)
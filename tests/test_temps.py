@@ -0,0 +1,21 @@
+import numpy as np
+
+import temps  # noqa: F401 (enregistre l'accesseur df.temps)
+
+
+def test_composantes_egal_dt(transactions):
+    dates = transactions["InvoiceDate"].dt
+    t = transactions.temps
+    np.testing.assert_array_equal(t.annee, dates.year)
+    np.testing.assert_array_equal(t.mois, dates.month)
+    np.testing.assert_array_equal(t.jour, dates.day)
+    np.testing.assert_array_equal(t.jour_semaine, dates.dayofweek)
+    np.testing.assert_array_equal(t.heure, dates.hour)
+    np.testing.assert_array_equal(t.semaine, dates.isocalendar().week)
+
+
+def test_cache_porte_par_le_dataframe(transactions):
+    # Un nouvel accesseur à chaque lecture (pandas 3) ne recalcule pas les composantes
+    assert transactions.temps.instants is transactions.temps.instants
+    tranche = transactions.iloc[10:]
+    assert len(tranche.temps.instants) == len(tranche)
@@ -1,15 +1,40 @@
 import pandas as pd
-from ydata_profiling import ProfileReport
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+from pandas.tseries.api import guess_datetime_format
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
 import os
+import warnings
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+
+from audit import (
+    MODES_AUDIT, ProfilDonnees, auditer, choisir_mode, ecrire_rapport_natif, profiler,
+)
+from lecture_parallele import iterer_excel, lire_csv_parallele
+from sketches import HyperLogLog, SketchQuantiles
+
+TAILLE_MORCEAU = 100_000
+TAILLE_ECHANTILLON = 1_000  # valeurs examinées pour décider du type d'une colonne
+NB_VALEURS_FORMAT = 20  # valeurs de l'échantillon dont on devine le format de date
+SEUIL_CATEGORIE = 0.5  # valeurs distinctes / valeurs présentes en dessous duquel le texte devient catégoriel
 
 
 # ===============================
 # 1. Chargement du dataset
 # ===============================
-def charger_donnees(fichier: str) -> pd.DataFrame:
+def charger_donnees(fichier: str, nb_processus: int = 1) -> pd.DataFrame:
     extension = os.path.splitext(fichier)[-1].lower()
 
+    # Plusieurs processus : lecture par plages d'octets (CSV / TXT seulement)
+    if nb_processus != 1 and extension in [".csv", ".txt"]:
+        return lire_csv_parallele(fichier, nb_processus, sep="\t" if extension == ".txt" else ",")
+
     if extension == ".csv":
         return pd.read_csv(fichier)
     elif extension in [".xls", ".xlsx"]:
@@ -24,47 +49,357 @@ def charger_donnees(fichier: str) -> pd.DataFrame:
         raise ValueError(f"Extension de fichier non supportée : {extension}")
 
 
+def _en_texte(morceau: pd.DataFrame) -> pd.DataFrame:
+    # Valeurs en texte (manquants conservés) : types et empreintes ne dépendent pas du découpage
+    return morceau.apply(lambda col: col.astype(str).where(col.notna()))
+
+
+def charger_donnees_par_morceaux(fichier: str, taille_morceau: int = TAILLE_MORCEAU) -> Iterator[pd.DataFrame]:
+    extension = os.path.splitext(fichier)[-1].lower()
+
+    if extension == ".csv":
+        morceaux = pd.read_csv(fichier, dtype=str, chunksize=taille_morceau)
+    elif extension == ".txt":
+        morceaux = pd.read_csv(fichier, delimiter="\t", dtype=str, chunksize=taille_morceau)
+    elif extension == ".xlsx":
+        morceaux = iterer_excel(fichier, taille_morceau)
+    elif extension == ".parquet":
+        morceaux = (lot.to_pandas() for lot in pq.ParquetFile(fichier).iter_batches(batch_size=taille_morceau))
+    else:
+        raise ValueError(f"Extension de fichier non supportée en mode flux : {extension}")
+
+    for morceau in morceaux:
+        yield _en_texte(morceau)
+
+
 # ===============================
 # 2. Nettoyage automatique
 # ===============================
-def nettoyer_donnees(df: pd.DataFrame) -> pd.DataFrame:
-    # Supprimer les doublons
-    df = df.drop_duplicates()
-
-    # Nettoyer les noms de colonnes
-    df.columns = (
-        df.columns
+def normaliser_noms_colonnes(colonnes: pd.Index) -> pd.Index:
+    return (
+        colonnes
         .str.strip()
         .str.lower()
         .str.replace(" ", "_")
         .str.replace("-", "_")
     )
 
-    # Conversion automatique des types (numériques / dates si possible)
-    for col in df.columns:
+
+def _peu_de_valeurs(valeurs: pd.Series) -> bool:
+    return valeurs.nunique() <= SEUIL_CATEGORIE * valeurs.notna().sum()
+
+
+def formats_date_candidats(valeurs: pd.Series) -> List[str]:
+    # Formats devinés sur les premières valeurs, mois puis jour en premier : une
+    # seule valeur ambiguë (jour <= 12) ne suffit pas à trancher
+    candidats: List[str] = []
+    for valeur in valeurs.iloc[:NB_VALEURS_FORMAT]:
+        if not isinstance(valeur, str):
+            continue
+        for jour_en_premier in (False, True):
+            with warnings.catch_warnings():
+                # Avertissement de pandas quand l'ordre deviné contredit dayfirst : attendu ici
+                warnings.simplefilter("ignore", UserWarning)
+                format_date = guess_datetime_format(valeur, dayfirst=jour_en_premier)
+            if format_date is not None and format_date not in candidats:
+                candidats.append(format_date)
+    return candidats
+
+
+def formats_compatibles(valeurs: pd.Series, candidats: List[str]) -> List[str]:
+    # Candidats, dans l'ordre, qui convertissent toutes les valeurs
+    compatibles = []
+    for format_date in candidats:
         try:
-            df[col] = pd.to_numeric(df[col])
-        except:
-            try:
-                df[col] = pd.to_datetime(df[col])
-            except:
-                pass  # garder tel quel si conversion impossible
-
-    # Gestion des valeurs manquantes :
-    for col in df.columns:
-        if df[col].isnull().sum() > 0:
-            if pd.api.types.is_numeric_dtype(df[col]):
-                df[col].fillna(df[col].median(), inplace=True)
-            else:
-                df[col].fillna("inconnu", inplace=True)
+            pd.to_datetime(valeurs, format=format_date)
+            compatibles.append(format_date)
+        except (ValueError, TypeError):
+            pass
+    return compatibles
+
+
+def inferer_type(colonne: pd.Series) -> Tuple[str, Optional[str]]:
+    # Type décidé sur un échantillon : ("numerique" | "date" | "categorie" | "texte", format de date)
+    if pd.api.types.is_numeric_dtype(colonne) or pd.api.types.is_datetime64_any_dtype(colonne):
+        return "natif", None
+    valeurs = colonne.dropna()
+    if valeurs.empty:
+        return "texte", None
+    echantillon = valeurs.sample(min(len(valeurs), TAILLE_ECHANTILLON), random_state=0)
+
+    try:
+        pd.to_numeric(echantillon)
+        return "numerique", None
+    except (ValueError, TypeError):
+        pass
+    formats = formats_compatibles(echantillon, formats_date_candidats(echantillon))
+    if formats:
+        return "date", formats[0]
+    return ("categorie" if _peu_de_valeurs(valeurs) else "texte"), None
+
+
+def convertir_colonne(colonne: pd.Series) -> pd.Series:
+    type_col, format_date = inferer_type(colonne)
+    if type_col == "numerique":
+        convertie = pd.to_numeric(colonne, errors="coerce")
+    elif type_col == "date":
+        convertie = pd.to_datetime(colonne, format=format_date, errors="coerce")
+    if type_col in ("numerique", "date"):
+        if convertie.isna().sum() == colonne.isna().sum():
+            return convertie
+        # L'échantillon a trompé : des valeurs ne se convertissent pas, la colonne reste du texte
+        type_col = "categorie" if _peu_de_valeurs(colonne) else "texte"
+    return colonne.astype("category") if type_col == "categorie" else colonne
+
+
+def completer_colonne(colonne: pd.Series) -> pd.Series:
+    if not colonne.hasnans:
+        return colonne
+    if pd.api.types.is_numeric_dtype(colonne):
+        return colonne.fillna(colonne.median())
+    if isinstance(colonne.dtype, pd.CategoricalDtype) and "inconnu" not in colonne.cat.categories:
+        colonne = colonne.cat.add_categories("inconnu")
+    return colonne.fillna("inconnu")
+
+
+def nettoyer_donnees(df: pd.DataFrame, nb_threads: int = 0) -> pd.DataFrame:
+    # Supprimer les doublons
+    df = df.drop_duplicates()
+
+    # Nettoyer les noms de colonnes
+    df.columns = normaliser_noms_colonnes(df.columns)
+
+    # Conversion des types (une seule conversion par colonne, colonnes en parallèle)
+    # puis gestion des valeurs manquantes : médiane si numérique, "inconnu" sinon
+    with ThreadPoolExecutor(max_workers=nb_threads or None) as executeur:
+        colonnes = list(executeur.map(
+            lambda col: completer_colonne(convertir_colonne(df[col])), df.columns
+        ))
+    return pd.concat(colonnes, axis=1)
+
 
-    return df
+# === Mode flux : deux passages sur les morceaux ===
+# Le premier passage fixe le type de chaque colonne (numérique, date, catégorie
+# ou texte, selon les règles de nettoyer_donnees) et alimente un sketch de
+# quantiles par colonne numérique ; le second convertit, complète et transmet
+# chaque morceau. Écarts avec le mode en mémoire : les manquants numériques sont
+# complétés par une médiane approchée (à 1 % près en valeur relative), et le
+# choix catégorie / texte repose sur un nombre de valeurs distinctes estimé
+# (HyperLogLog, ~1,6 %), qui ne diffère que pour une colonne proche du seuil.
+# La mémoire dépend de la taille des morceaux, plus 8 octets par ligne distincte
+# pour le dédoublonnage.
+class EmpreintesVues:
+    # Empreintes 64 bits des lignes déjà rencontrées, en séries triées de tailles
+    # décroissantes : une nouvelle série est fusionnée avec les dernières tant
+    # qu'elles ne sont pas plus grandes (chaque empreinte est recopiée O(log n)
+    # fois, au lieu de recopier tout le tableau à chaque morceau)
+    def __init__(self):
+        self.series: List[np.ndarray] = []
+
+    def _deja_vues(self, empreintes: np.ndarray) -> np.ndarray:
+        vues = np.zeros(len(empreintes), dtype=bool)
+        for serie in self.series:
+            positions = np.minimum(np.searchsorted(serie, empreintes), len(serie) - 1)
+            vues |= serie[positions] == empreintes
+        return vues
+
+    def dedoublonner(self, morceau: pd.DataFrame) -> pd.DataFrame:
+        empreintes = pd.util.hash_pandas_object(morceau, index=False).to_numpy()
+        garder = ~self._deja_vues(empreintes) & ~pd.Series(empreintes).duplicated().to_numpy()
+
+        nouvelle = np.sort(empreintes[garder])
+        while self.series and len(self.series[-1]) <= len(nouvelle):
+            nouvelle = np.sort(np.concatenate([self.series.pop(), nouvelle]))
+        if len(nouvelle):
+            self.series.append(nouvelle)
+        return morceau[garder]
+
+
+def _profiler_colonnes(morceaux: Iterator[pd.DataFrame]) -> Tuple[Dict[str, Tuple[str, object]], set, set]:
+    # Type retenu par colonne : ("numerique", sketch), ("date", format),
+    # ("categorie", None) ou ("texte", None). Comme nettoyer_donnees : numérique si
+    # toute la colonne se convertit, sinon date (formats candidats devinés comme
+    # dans inferer_type sur le premier morceau, premier format qui convertit tous
+    # les morceaux), sinon catégorie ou texte selon la part de valeurs distinctes.
+    types: Dict[str, Tuple[str, object]] = {}
+    distincts: Dict[str, HyperLogLog] = {}
+    presentes: Dict[str, int] = {}
+    incompletes, decimales = set(), set()
+    vues = EmpreintesVues()
+    for morceau in morceaux:
+        morceau = vues.dedoublonner(morceau)
+        incompletes.update(morceau.columns[morceau.isnull().any().to_numpy()])
+        for col in morceau.columns:
+            type_col, info = types.setdefault(col, ("numerique", SketchQuantiles()))
+            valeurs = morceau[col].dropna()
+            if valeurs.empty:
+                continue
+            distincts.setdefault(col, HyperLogLog()).ajouter(
+                pd.util.hash_pandas_object(valeurs, index=False).to_numpy())
+            presentes[col] = presentes.get(col, 0) + len(valeurs)
+            if type_col == "texte":
+                continue
+            if type_col == "numerique":
+                try:
+                    valeurs = pd.to_numeric(valeurs)
+                    info.ajouter(valeurs.to_numpy(dtype=float))
+                    if not pd.api.types.is_integer_dtype(valeurs):
+                        decimales.add(col)
+                    continue
+                except (ValueError, TypeError):
+                    # Colonne déjà numérique sur des morceaux précédents : texte
+                    if info.effectif:
+                        types[col] = ("texte", None)
+                        continue
+                    echantillon = valeurs.sample(min(len(valeurs), TAILLE_ECHANTILLON), random_state=0)
+                    type_col, info = types[col] = ("date", formats_date_candidats(echantillon))
+            # Formats candidats qui convertissent encore toutes les valeurs vues
+            info[:] = formats_compatibles(valeurs, info)
+            if not info:
+                types[col] = ("texte", None)
+
+    for col, (type_col, info) in types.items():
+        if type_col == "date":
+            types[col] = ("date", info[0])
+        elif type_col == "texte" and distincts[col].estimation() <= SEUIL_CATEGORIE * presentes[col]:
+            types[col] = ("categorie", None)
+    return types, incompletes, decimales
+
+
+def _typer_morceau(morceau: pd.DataFrame, types: Dict[str, Tuple[str, object]],
+                   incompletes: set, decimales: set) -> pd.DataFrame:
+    # Types du premier passage, manquants conservés
+    morceau = morceau.copy()
+    for col, (type_col, info) in types.items():
+        if type_col == "numerique":
+            valeurs = pd.to_numeric(morceau[col])
+            # Une colonne incomplète ou décimale l'est aussi dans les morceaux sans manquant ou sans décimale
+            morceau[col] = valeurs.astype(float) if col in incompletes or col in decimales else valeurs
+        elif type_col == "date":
+            morceau[col] = pd.to_datetime(morceau[col], format=info)
+    return morceau
+
+
+def nettoyer_donnees_par_morceaux(source: Callable[[], Iterator[pd.DataFrame]],
+                                  profil_avant: Optional[ProfilDonnees] = None) -> Iterator[pd.DataFrame]:
+    # source() relance la lecture du fichier (un appel par passage) ; le profil
+    # d'audit des données brutes est calculé pendant le second passage, sur les
+    # morceaux typés avant dédoublonnage et complétion
+    types, incompletes, decimales = _profiler_colonnes(source())
+    medianes = {
+        col: info.quantiles([0.5])[0] if info.effectif else np.nan
+        for col, (type_col, info) in types.items() if type_col == "numerique"
+    }
+
+    vues = EmpreintesVues()
+    for brut in source():
+        morceau = _typer_morceau(brut, types, incompletes, decimales)
+        if profil_avant is not None:
+            profil_avant.ajouter(morceau)
+        garder = vues.dedoublonner(brut).index
+        morceau = morceau.loc[garder]
+        for col, (type_col, _) in types.items():
+            if col in incompletes:
+                if type_col == "numerique":
+                    morceau[col] = morceau[col].fillna(medianes[col])
+                elif type_col == "date":
+                    morceau[col] = morceau[col].astype(object).where(morceau[col].notna(), "inconnu")
+                else:
+                    morceau[col] = morceau[col].fillna("inconnu")
+            if type_col == "categorie":
+                morceau[col] = morceau[col].astype("category")
+        morceau.columns = normaliser_noms_colonnes(morceau.columns)
+        yield morceau
 
 
 # ===============================
 # 3. Sauvegarde du dataset nettoyé
 # ===============================
-def sauvegarder_donnees(df: pd.DataFrame, fichier_entree: str) -> str:
+# Parquet, Feather et CSV compressé s'écrivent par lots Arrow, quel que soit le
+# format d'entrée : pas de to_excel ligne à ligne. Un Feather non compressé (par
+# défaut) se projette en mémoire comme le cache des tableaux de bord.
+FORMATS_SORTIE = {"parquet": ".parquet", "feather": ".feather", "csv.gz": ".csv.gz"}
+
+
+@dataclass(frozen=True)
+class OptionsSortie:
+    format: Optional[str] = None  # clé de FORMATS_SORTIE ; None : format du fichier d'entrée
+    compression: Optional[str] = None  # défaut : snappy (Parquet), aucune (Feather), gzip (CSV)
+    taille_groupe: int = 100_000  # lignes par groupe de lignes (Parquet) ou par lot écrit
+    dictionnaire: bool = True  # encodage par dictionnaire des colonnes Parquet
+
+
+def _table_arrow(morceau: pd.DataFrame) -> pa.Table:
+    # Colonnes mixtes (dates complétées par "inconnu", codes entiers et texte) : texte
+    mixtes = {}
+    for col in morceau.columns:
+        if morceau[col].dtype == object:
+            mixtes[col] = str
+        elif isinstance(morceau[col].dtype, pd.CategoricalDtype) and morceau[col].cat.categories.dtype == object:
+            mixtes[col] = pd.CategoricalDtype(morceau[col].cat.categories.astype(str).unique())
+    if mixtes:
+        morceau = morceau.astype({col: str for col in mixtes}).astype(
+            {col: type_col for col, type_col in mixtes.items() if type_col is not str}
+        )
+    table = pa.Table.from_pandas(morceau, preserve_index=False)
+    # Indices de dictionnaire en int32 : le type ne dépend pas du nombre de
+    # catégories du morceau, tous les lots d'un fichier gardent le même schéma
+    return table.cast(pa.schema([
+        champ.with_type(pa.dictionary(pa.int32(), champ.type.value_type))
+        if pa.types.is_dictionary(champ.type) else champ
+        for champ in table.schema
+    ], metadata=table.schema.metadata))
+
+
+def ecrire_par_lots(morceaux: Iterator[pd.DataFrame], sortie: str, options: OptionsSortie) -> Tuple[int, int]:
+    # Écrit les morceaux au format options.format ; retourne le nombre de lignes et de colonnes
+    ecrivain, flux, schema = None, None, None
+    nb_lignes, nb_colonnes = 0, 0
+    try:
+        for morceau in morceaux:
+            table = _table_arrow(morceau)
+            if options.format == "csv.gz":
+                # Le CSV n'a pas de dictionnaire : catégories écrites en texte
+                table = table.cast(pa.schema([
+                    champ.with_type(champ.type.value_type) if pa.types.is_dictionary(champ.type) else champ
+                    for champ in table.schema
+                ]))
+            if ecrivain is None:
+                schema = table.schema
+                if options.format == "parquet":
+                    ecrivain = pq.ParquetWriter(sortie, schema, compression=options.compression or "snappy",
+                                                use_dictionary=options.dictionnaire)
+                elif options.format == "feather":
+                    compression = None if options.compression in (None, "uncompressed") else options.compression
+                    ecrivain = pa.ipc.new_file(sortie, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+                elif options.format == "csv.gz":
+                    flux = pa.CompressedOutputStream(sortie, options.compression or "gzip")
+                    ecrivain = pacsv.CSVWriter(flux, schema)
+                else:
+                    raise ValueError(f"Format de sortie non supporté : {options.format}")
+            table = table.cast(schema)
+            if options.format == "parquet":
+                ecrivain.write_table(table, row_group_size=options.taille_groupe)
+            else:
+                ecrivain.write_table(table, max_chunksize=options.taille_groupe)
+            nb_lignes, nb_colonnes = nb_lignes + len(morceau), morceau.shape[1]
+    finally:
+        if ecrivain is not None:
+            ecrivain.close()
+        if flux is not None:
+            flux.close()
+    return nb_lignes, nb_colonnes
+
+
+def sauvegarder_donnees(df: pd.DataFrame, fichier_entree: str, options: OptionsSortie = OptionsSortie()) -> str:
+    if options.format is not None:
+        sortie = "donnees_nettoyees" + FORMATS_SORTIE[options.format]
+        ecrire_par_lots(
+            (df.iloc[debut:debut + options.taille_groupe] for debut in range(0, max(len(df), 1), options.taille_groupe)),
+            sortie, options,
+        )
+        return sortie
+
     extension = os.path.splitext(fichier_entree)[-1].lower()
     sortie = "donnees_nettoyees" + extension
 
@@ -84,46 +419,146 @@ def sauvegarder_donnees(df: pd.DataFrame, fichier_entree: str) -> str:
     return sortie
 
 
+def sauvegarder_donnees_par_morceaux(morceaux: Iterator[pd.DataFrame], fichier_entree: str,
+                                     options: OptionsSortie = OptionsSortie()) -> Tuple[str, int, int]:
+    # Écriture au fil des morceaux ; retourne le fichier, le nombre de lignes et de colonnes
+    if options.format is not None:
+        sortie = "donnees_nettoyees" + FORMATS_SORTIE[options.format]
+        return (sortie, *ecrire_par_lots(morceaux, sortie, options))
+
+    extension = os.path.splitext(fichier_entree)[-1].lower()
+    sortie = "donnees_nettoyees" + extension
+    nb_lignes, nb_colonnes = 0, 0
+
+    if extension in [".csv", ".txt"]:
+        for i, morceau in enumerate(morceaux):
+            morceau.to_csv(sortie, index=False, sep="\t" if extension == ".txt" else ",",
+                           mode="w" if i == 0 else "a", header=i == 0)
+            nb_lignes, nb_colonnes = nb_lignes + len(morceau), morceau.shape[1]
+    elif extension == ".xlsx":
+        classeur = Workbook(write_only=True)
+        feuille = classeur.create_sheet()
+        for i, morceau in enumerate(morceaux):
+            if i == 0:
+                feuille.append(list(morceau.columns))
+            for ligne in morceau.itertuples(index=False):
+                feuille.append(list(ligne))
+            nb_lignes, nb_colonnes = nb_lignes + len(morceau), morceau.shape[1]
+        classeur.save(sortie)
+    elif extension == ".parquet":
+        nb_lignes, nb_colonnes = ecrire_par_lots(morceaux, sortie, replace(options, format="parquet"))
+    else:
+        raise ValueError(f"Extension de fichier non supportée en mode flux : {extension}")
+
+    return sortie, nb_lignes, nb_colonnes
+
+
 # ===============================
 # 4. Programme principal
 # ===============================
+def analyser_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Audit et nettoyage automatique d'un dataset")
+    parser.add_argument("fichier", nargs="?", help="Chemin du fichier (demandé si absent)")
+    parser.add_argument("--prefixe", help="Préfixe des rapports (défaut : rapport)")
+    parser.add_argument("-j", "--processus", type=int, default=1,
+                        help="Nombre de processus de lecture, 0 = tous les cœurs (CSV/TXT seulement : "
+                             "les autres formats sont lus en série)")
+    parser.add_argument("--flux", action="store_true",
+                        help="Nettoyage par morceaux (CSV/TXT/XLSX/Parquet), audit natif seulement ; "
+                             "mémoire : un morceau plus 8 octets par ligne distincte ; "
+                             "manquants numériques complétés par une médiane approchée (1 %%)")
+    parser.add_argument("--taille-morceau", type=int, default=TAILLE_MORCEAU,
+                        help=f"Lignes par morceau en mode flux (défaut : {TAILLE_MORCEAU})")
+    parser.add_argument("--audit", choices=["auto", "natif", *MODES_AUDIT], default="auto",
+                        help="natif : profils en une passe et comparaison avant / après, sans "
+                             "ydata-profiling ; complet : profil exhaustif ; rapide : échantillon, "
+                             "profil minimal, sans corrélations ; aucun ; auto (défaut) : natif "
+                             "au-delà d'un million de lignes, rapide sinon")
+    parser.add_argument("--echantillon", type=int,
+                        help="Lignes profilées par audit (0 = toutes)")
+    parser.add_argument("--format", choices=list(FORMATS_SORTIE),
+                        help="Format du fichier nettoyé (défaut : celui du fichier d'entrée)")
+    parser.add_argument("--compression",
+                        help="Codec de sortie : snappy, zstd, gzip... (Parquet), lz4, zstd (Feather), gzip (CSV)")
+    parser.add_argument("--taille-groupe", type=int, default=OptionsSortie.taille_groupe,
+                        help="Lignes par groupe de lignes Parquet / par lot écrit")
+    parser.add_argument("--sans-dictionnaire", action="store_true",
+                        help="Désactive l'encodage par dictionnaire des colonnes Parquet")
+    return parser.parse_args()
+
+
 def main():
-    fichier = input("👉 Entrez le chemin de votre fichier : ").strip()
+    args = analyser_arguments()
+
+    # Sans argument, les informations sont demandées comme auparavant
+    fichier = args.fichier or input("👉 Entrez le chemin de votre fichier : ").strip()
     fichier = os.path.abspath(fichier)
 
-    base_sortie = input("👉 Préfixe des rapports [rapport] : ").strip() or "rapport"
+    base_sortie = args.prefixe or (
+        "rapport" if args.fichier else input("👉 Préfixe des rapports [rapport] : ").strip() or "rapport"
+    )
+
+    options_sortie = OptionsSortie(args.format, args.compression, args.taille_groupe, not args.sans_dictionnaire)
 
     try:
         if not os.path.exists(fichier):
             raise FileNotFoundError(f"Le fichier {fichier} n'existe pas.")
 
+        # Mode flux : le fichier n'est jamais chargé en entier
+        if args.flux:
+            # Seul l'audit natif se calcule au fil des morceaux
+            avant, apres = (None, None) if args.audit == "aucun" else (ProfilDonnees(), ProfilDonnees())
+            morceaux = nettoyer_donnees_par_morceaux(
+                lambda: charger_donnees_par_morceaux(fichier, args.taille_morceau), avant
+            )
+            if apres is not None:
+                morceaux = apres.suivre(morceaux)
+            fichier_nettoye, nb_lignes, nb_colonnes = sauvegarder_donnees_par_morceaux(morceaux, fichier, options_sortie)
+            if nb_lignes == 0:
+                raise ValueError("Le fichier est vide.")
+            print(f"🧹 Données nettoyées : {nb_lignes} lignes, {nb_colonnes} colonnes")
+            print(f"💾 Données nettoyées sauvegardées dans : {fichier_nettoye}")
+            if avant is not None:
+                rapport = ecrire_rapport_natif(avant, apres, f"{base_sortie}_audit.html")
+                print(f"📊 Rapport d'audit natif généré : {rapport}")
+                webbrowser.open(rapport)
+            return
+
         # Étape 1 : Chargement
-        df = charger_donnees(fichier)
+        df = charger_donnees(fichier, args.processus)
         if df.empty:
             raise ValueError("Le fichier est vide.")
         print(f"✅ Dataset chargé : {df.shape[0]} lignes, {df.shape[1]} colonnes")
 
-        # Étape 2 : Audit AVANT nettoyage
-        rapport_avant = f"{base_sortie}_avant.html"
-        profile_avant = ProfileReport(df, title="Audit AVANT Nettoyage", explorative=True, minimal=False)
-        profile_avant.to_file(rapport_avant)
-        print(f"📊 Rapport AVANT nettoyage généré : {rapport_avant}")
-
-        # Étape 3 : Nettoyage
+        # Étape 2 : Nettoyage
         df_clean = nettoyer_donnees(df)
         print(f"🧹 Données nettoyées : {df_clean.shape[0]} lignes, {df_clean.shape[1]} colonnes")
 
-        # Étape 4 : Sauvegarde du dataset propre
-        fichier_nettoye = sauvegarder_donnees(df_clean, fichier)
+        # Étape 3 : Sauvegarde du dataset propre
+        fichier_nettoye = sauvegarder_donnees(df_clean, fichier, options_sortie)
         print(f"💾 Données nettoyées sauvegardées dans : {fichier_nettoye}")
 
-        # Étape 5 : Audit APRES nettoyage
-        rapport_apres = f"{base_sortie}_apres.html"
-        profile_apres = ProfileReport(df_clean, title="Audit APRES Nettoyage", explorative=True, minimal=False)
-        profile_apres.to_file(rapport_apres)
+        # Étape 4 : Audits AVANT / APRES nettoyage
+        mode = choisir_mode(len(df)) if args.audit == "auto" else args.audit
+        if mode == "natif":
+            rapport = ecrire_rapport_natif(profiler(df), profiler(df_clean), f"{base_sortie}_audit.html")
+            print(f"📊 Rapport d'audit natif généré : {rapport}")
+            webbrowser.open(rapport)
+            return
+        config = MODES_AUDIT[mode]
+        if config is None:
+            print("ℹ️ Audits désactivés (--audit aucun)")
+            return
+        if args.echantillon is not None:
+            config = replace(config, echantillon=args.echantillon or None)
+        rapport_avant, rapport_apres = auditer([
+            (df, "Audit AVANT Nettoyage", f"{base_sortie}_avant.html"),
+            (df_clean, "Audit APRES Nettoyage", f"{base_sortie}_apres.html"),
+        ], config)
+        print(f"📊 Rapport AVANT nettoyage généré : {rapport_avant}")
         print(f"📊 Rapport APRES nettoyage généré : {rapport_apres}")
 
-        # Étape 6 : Ouvrir les rapports automatiquement
+        # Étape 5 : Ouvrir les rapports automatiquement
         webbrowser.open(rapport_avant)
         webbrowser.open(rapport_apres)
 
@@ -4,6 +4,21 @@ import plotly.graph_objects as go
 import streamlit as st
 from datetime import datetime, timedelta
 import numpy as np
+import os
+
+from cache_donnees import FICHIER_SOURCE, charger_donnees_brutes, empreinte_source
+from pipeline_nettoyage import ETAPES_COMPLETES, empreinte_pipeline, etapes_incrementales, executer_pipeline
+from cube_ventes import (PERIODES, ca_par_pays, clients_approches, clients_approches_par_mois, construire_cube,
+                         filtrer_cube, serie_par_periode, top_produits_par_pays)
+from kpi import calculer_kpis_partitions
+from pareto import ServicePareto
+from partitions import partitionner
+from etat_rfm import mettre_a_jour_etat_rfm
+from fenetre_donnees import FenetreDonnees
+from ingestion import DOSSIER_DEPOT, Entrepot
+from rfm import ServiceRFM
+from agregats_temporels import ServiceTemporel
+from temps import libelles_jours, libelles_mois
 
 # === 1. CONFIGURATION ===
 st.set_page_config(page_title="Analyse Online Retail", layout="wide", page_icon="📊")
@@ -14,57 +29,122 @@ COLOR_SEQ = px.colors.qualitative.Set3
 COLOR_SCALE = px.colors.sequential.Blues
 
 # === 2. CHARGEMENT ET NETTOYAGE DES DONNÉES ===
-@st.cache_data
+# Appelé une seule fois, par load_partitions : pas de cache_data, qui garderait
+# une copie sérialisée du tableau nettoyé en plus des partitions partagées
 def load_data():
     try:
-        df = pd.read_excel("Online Retail.xlsx")
-        
-        # Nettoyage des données
-        df = df.dropna(subset=["CustomerID"])
-        df = df[df["UnitPrice"] > 0]
-        df = df.drop_duplicates()
-        
-        # Identifier les annulations (méthode exacte)
-        df['Is_Cancellation'] = df["InvoiceNo"].astype(str).str.startswith("C")
-        
-        # Filtrer les quantités aberrantes (sauf pour les annulations)
-        normal_transactions = df[~df['Is_Cancellation']]
-        Q1 = normal_transactions['Quantity'].quantile(0.01)
-        Q3 = normal_transactions['Quantity'].quantile(0.99)
-        
-        # Appliquer le filtre seulement aux transactions normales
-        df_filtered = df[df['Is_Cancellation'] | ((df['Quantity'] >= Q1) & (df['Quantity'] <= Q3))]
-        
-        # Calculer le revenu
-        df_filtered["Revenue"] = df_filtered["Quantity"] * df_filtered["UnitPrice"]
-        
-        # Ajouter des colonnes temporelles
-        df_filtered['Year'] = df_filtered['InvoiceDate'].dt.year
-        df_filtered['Month'] = df_filtered['InvoiceDate'].dt.month
-        df_filtered['Month_Name'] = df_filtered['InvoiceDate'].dt.month_name()
-        df_filtered['Day'] = df_filtered['InvoiceDate'].dt.day
-        df_filtered['DayOfWeek'] = df_filtered['InvoiceDate'].dt.day_name()
-        df_filtered['Hour'] = df_filtered['InvoiceDate'].dt.hour
-        df_filtered['Week'] = df_filtered['InvoiceDate'].dt.isocalendar().week
-        df_filtered['Week_Year'] = df_filtered['InvoiceDate'].dt.strftime('%Y-W%U')
-        
-        return df_filtered
+        # Nettoyage, annulations, valeurs aberrantes et colonnes temporelles
+        return executer_pipeline(charger_donnees_brutes(), ETAPES_COMPLETES)
         
     except Exception as e:
         st.error(f"Erreur lors du chargement des données: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame()
+
+# Mode ingestion incrémentale : activé par la présence du dossier de dépôt
+MODE_INGESTION = os.path.isdir(DOSSIER_DEPOT)
+
+# Entrepôt par mois des lots nettoyés ; le premier lot est le fichier source
+# complet, qui fixe les bornes de quantités appliquées aux lots suivants
+@st.cache_resource
+def load_entrepot():
+    entrepot = Entrepot()
+    if entrepot.vide:
+        entrepot.ajouter(charger_donnees_brutes(), FICHIER_SOURCE, empreinte_source())
+    entrepot.ingerer_depot()
+    return entrepot
+
+# Mode ingestion : fenêtre (période x pays) lue dans les seules partitions
+# mensuelles qui la recoupent ; les fenêtres récentes restent en mémoire
+@st.cache_resource(max_entries=8)
+def load_fenetre(debut, fin, pays):
+    return FenetreDonnees(load_entrepot(), debut, fin, list(pays))
+
+# Ventes, retours et annulations séparés une seule fois, chacun avec son index
+# chronologique et par pays (partagés entre les sessions, en lecture seule)
+@st.cache_resource
+def load_partitions():
+    df, rapport = load_data()
+    if df.empty:
+        return None, rapport
+    return partitionner(df), rapport
+
+# Cube (jour x pays x produit / client) des ventes, construit une seule fois
+@st.cache_resource
+def load_cube():
+    partitions, _ = load_partitions()
+    return construire_cube(partitions.ventes.lignes)
+
+# Top 10 produits de chaque pays sur toute la période, précalculé pour tous les pays
+@st.cache_resource
+def load_top_produits():
+    return top_produits_par_pays(load_cube().produits, 10)
+
+# Analyses Pareto par état de filtre (cache LRU partagé entre les sessions)
+@st.cache_resource
+def load_service_pareto():
+    return ServicePareto(capacite=64)
+
+# Tableaux RFM par état de filtre (cache LRU partagé entre les sessions)
+@st.cache_resource
+def load_service_rfm():
+    return ServiceRFM(capacite=64)
+
+# Agrégats (année, mois, jour, heure) par état de filtre (cache LRU partagé entre les sessions)
+@st.cache_resource
+def load_service_temporel():
+    return ServiceTemporel(capacite=64)
+
+# État RFM persistant, lié au fichier source (ou aux lots de l'entrepôt) et aux
+# règles de nettoyage : en mode ingestion, seules les partitions des lots qu'il
+# n'a pas encore fusionnés sont lues. Une entrée par version des données.
+@st.cache_resource(max_entries=1)
+def load_etat_rfm(version_donnees):
+    if not MODE_INGESTION:
+        partitions, _ = load_partitions()
+        return mettre_a_jour_etat_rfm([empreinte_source()], lambda depuis: partitions.ventes.lignes,
+                                      empreinte_pipeline(ETAPES_COMPLETES))
+    entrepot = load_entrepot()
+    seuils = entrepot.manifeste["seuils"]
+    sources = entrepot.empreintes_lots()
+    return mettre_a_jour_etat_rfm(
+        sources,
+        lambda depuis: partitionner(entrepot.charger(depuis_lot=depuis, jusqu_au_lot=len(sources))).ventes.lignes,
+        empreinte_pipeline(etapes_incrementales(seuils), seuils),
+    )
+
+if MODE_INGESTION:
+    entrepot = load_entrepot()
+
+    # Extraits déposés depuis le dernier passage (vérifié à chaque exécution du
+    # script) : les fenêtres et l'état RFM liront leurs partitions
+    try:
+        entrepot.ingerer_depot()
+    except Exception as e:
+        st.error(f"Erreur lors de l'ingestion du dépôt: {e}")
+
+    if entrepot.vide:
+        st.stop()
+    # Bornes et pays lus dans la description des partitions, sans charger de données
+    min_date, max_date = entrepot.bornes_dates()
+    all_countries = entrepot.pays()
+    rapport_chargement = entrepot.rapport()
+else:
+    partitions, rapport_chargement = load_partitions()
 
-df = load_data()
+    if partitions is None:
+        st.stop()
 
-if df.empty:
-    st.stop()
+    cube = load_cube()
+    min_date, max_date = partitions.bornes_dates()
+    all_countries = partitions.pays()
+
+# Version des données, pour que les caches par filtre ignorent les états antérieurs
+version_donnees = entrepot.nb_lots if MODE_INGESTION else 0
 
 # === 3. FILTRES INTERACTIFS ===
 st.sidebar.header("🔧 Filtres Interactifs")
 
 # Filtre temporel
-min_date = df["InvoiceDate"].min()
-max_date = df["InvoiceDate"].max()
 start_date, end_date = st.sidebar.date_input(
     "Sélectionnez une plage de dates",
     [min_date, max_date],
@@ -73,7 +153,6 @@ start_date, end_date = st.sidebar.date_input(
 )
 
 # Filtre par pays avec option "Tous"
-all_countries = sorted(df["Country"].unique())
 selected_countries = st.sidebar.multiselect(
     "Sélectionnez les pays",
     options=["Tous"] + all_countries,
@@ -86,44 +165,81 @@ if "Tous" in selected_countries:
 else:
     selected_countries = [c for c in selected_countries if c != "Tous"]
 
-# Appliquer les filtres
-df_filtered = df[
-    (df["InvoiceDate"] >= pd.to_datetime(start_date)) & 
-    (df["InvoiceDate"] <= pd.to_datetime(end_date)) &
-    (df["Country"].isin(selected_countries))
-]
+# Nombre de pays au-delà duquel le détail des top produits n'est pas affiché
+# (un seul pays dans les données : pas de curseur, min_value et max_value seraient égaux)
+if len(all_countries) > 1:
+    nb_pays_detailles = st.sidebar.slider(
+        "Nombre max de pays détaillés (top produits)",
+        min_value=1,
+        max_value=len(all_countries),
+        value=min(10, len(all_countries))
+    )
+else:
+    nb_pays_detailles = 1
+
+# Clients distincts approchés : sketches HyperLogLog du cube au lieu d'un passage sur les ventes
+comptes_approches = st.sidebar.checkbox(
+    "Comptes de clients approchés (HyperLogLog)",
+    value=False,
+    help="Clients distincts du tableau de bord exécutif et du détail des mois estimés à partir "
+         "des sketches du cube, plus rapide sur de grands volumes. Les autres vues (commandes, "
+         "annulations, CA) restent exactes ; désactivé, tous les comptes sont exacts"
+)
+
+# Temps passé dans chaque étape du nettoyage
+with st.sidebar.expander("⏱️ Étapes du chargement"):
+    st.dataframe(rapport_chargement, use_container_width=True)
 
-# === 4. SÉPARATION DES DONNÉES (MÉTHODE EXACTE) ===
-# Identifier les annulations (méthode exacte)
-annulation = df_filtered[df_filtered["InvoiceNo"].astype(str).str.startswith("C")]
+# Mode ingestion : partitions et cube de la fenêtre sélectionnée, complétés par
+# les partitions des lots arrivés depuis leur chargement
+if MODE_INGESTION:
+    fenetre = load_fenetre(start_date, end_date, tuple(selected_countries)).actualiser()
+    if fenetre.partitions is None:
+        st.warning("Aucune donnée pour la période et les pays sélectionnés")
+        st.stop()
+    partitions, cube = fenetre.partitions, fenetre.cube
 
-# Identifier les retours
-retours = df_filtered[(df_filtered["Quantity"] < 0) & (~df_filtered['Is_Cancellation'])]
+# Appliquer les filtres : tranche de dates par recherche dichotomique (date de fin
+# incluse), puis positions des pays sélectionnés dans cette tranche
+cube_filtered = filtrer_cube(cube, start_date, end_date, selected_countries)
 
-# Identifier les ventes réelles
-ventes = df_filtered[(df_filtered["Quantity"] > 0) & (~df_filtered['Is_Cancellation'])]
+# === 4. SÉPARATION DES DONNÉES (MÉTHODE EXACTE) ===
+# Partitions construites au chargement : chacune est filtrée indépendamment
+annulation = partitions.annulations.filtrer(start_date, end_date, selected_countries)
+retours = partitions.retours.filtrer(start_date, end_date, selected_countries)
+ventes = partitions.ventes.filtrer(start_date, end_date, selected_countries)
 
 # === 5. KPI PRINCIPAUX ===
 st.header("📈 Tableau de Bord Exécutif")
 
-# Calcul des métriques
-total_revenue = ventes["Revenue"].sum()
-nb_orders = ventes["InvoiceNo"].nunique()
-nb_customers = ventes["CustomerID"].nunique()
-avg_basket = total_revenue / nb_orders if nb_orders > 0 else 0
+# Calcul des métriques (un seul passage sur les partitions filtrées)
+kpis = calculer_kpis_partitions(ventes, annulation, retours, compter_clients=not comptes_approches)
+total_revenue = kpis.ca_total
+nb_orders = kpis.nb_commandes
+nb_customers = kpis.nb_clients
+if comptes_approches:
+    sketch_clients = clients_approches(cube, start_date, end_date, selected_countries)
+    nb_customers = round(sketch_clients.estimation())
+avg_basket = kpis.panier_moyen
 
-nb_annulations = annulation["InvoiceNo"].nunique()
-nb_produits_annules = abs(annulation["Quantity"].sum())
-valeur_annulations = abs(annulation["Revenue"].sum())
+nb_annulations = kpis.nb_annulations
+nb_produits_annules = kpis.produits_annules
+valeur_annulations = kpis.valeur_annulations
 
-ca_retours = abs(retours["Revenue"].sum()) if not retours.empty else 0
-nb_retours = retours["InvoiceNo"].nunique() if not retours.empty else 0
+ca_retours = kpis.ca_retours
+nb_retours = kpis.nb_retours
 
 # Affichage des KPIs
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("CA Total", f"{total_revenue:,.0f} £")
 col2.metric("Commandes", f"{nb_orders:,}")
-col3.metric("Clients", f"{nb_customers:,}")
+if comptes_approches:
+    # Borne d'erreur : un écart-type relatif de l'estimateur HyperLogLog
+    col3.metric("Clients", f"≈ {nb_customers:,}",
+                help=f"Estimation HyperLogLog : ± {nb_customers * sketch_clients.erreur_relative:,.0f} "
+                     f"clients ({sketch_clients.erreur_relative:.1%}, un écart-type)")
+else:
+    col3.metric("Clients", f"{nb_customers:,}")
 col4.metric("Panier Moyen", f"{avg_basket:,.2f} £")
 
 col5, col6, col7, col8 = st.columns(4)
@@ -138,8 +254,7 @@ st.markdown("---")
 st.header("🌍 Analyse Géographique")
 
 # CA par pays
-country_revenue = ventes.groupby("Country")["Revenue"].sum().reset_index()
-country_revenue = country_revenue.sort_values("Revenue", ascending=False)
+country_revenue = ca_par_pays(cube_filtered)
 
 col1, col2 = st.columns([2, 1])
 
@@ -193,13 +308,17 @@ with col2:
 # === 7. PRODUITS LES PLUS PAYÉS PAR PAYS ===
 st.header("💰 Produits les Plus Payés par Pays")
 
-if len(selected_countries) <= 10:
+# Table précalculée sur toute la période, sinon une seule agrégation pour tous les pays
+if not MODE_INGESTION and (start_date, end_date) == (min_date.date(), max_date.date()):
+    top_par_pays = load_top_produits()
+else:
+    top_par_pays = top_produits_par_pays(cube_filtered.produits, 10)
+
+if len(selected_countries) <= nb_pays_detailles:
     for country in selected_countries:
         st.subheader(f"🏆 Top 10 Produits - {country}")
         
-        country_products = ventes[ventes["Country"] == country]
-        top_products = country_products.groupby("Description")["Revenue"].sum().reset_index()
-        top_products = top_products.sort_values("Revenue", ascending=False).head(10)
+        top_products = top_par_pays.get(country, pd.DataFrame(columns=["Description", "Revenue"]))
         
         if not top_products.empty:
             fig = px.bar(
@@ -230,21 +349,21 @@ if len(selected_countries) <= 10:
 # === 8. ANALYSE PARETO DES PRODUITS ===
 st.header("📊 Analyse Pareto des Produits")
 
-# Analyse Pareto globale
-pareto_df = ventes.groupby("Description")["Revenue"].sum().reset_index()
-pareto_df = pareto_df.sort_values("Revenue", ascending=False)
-pareto_df["cumperc"] = pareto_df["Revenue"].cumsum() / pareto_df["Revenue"].sum() * 100
+# Analyse Pareto globale, mise en cache par état des filtres
+cle_filtres = (start_date, end_date, tuple(selected_countries), version_donnees)
+pareto = load_service_pareto().analyse(cle_filtres, cube_filtered.produits)
+pareto_df = pareto.top(20)
 
 fig_pareto = go.Figure()
 fig_pareto.add_trace(go.Bar(
-    x=pareto_df["Description"].head(20),
-    y=pareto_df["Revenue"].head(20),
+    x=pareto_df["Description"],
+    y=pareto_df["Revenue"],
     name="CA par produit",
     marker_color=COLOR_SEQ[0]
 ))
 fig_pareto.add_trace(go.Scatter(
-    x=pareto_df["Description"].head(20),
-    y=pareto_df["cumperc"].head(20),
+    x=pareto_df["Description"],
+    y=pareto_df["cumperc"],
     mode="lines+markers",
     name="% cumulé",
     yaxis="y2",
@@ -261,18 +380,19 @@ fig_pareto.update_layout(
 st.plotly_chart(fig_pareto, use_container_width=True)
 
 # Détails Pareto
-top_20_percent = pareto_df.head(int(len(pareto_df) * 0.2))
-ca_top_20 = top_20_percent["Revenue"].sum()
-percentage_top_20 = (ca_top_20 / total_revenue) * 100
+nb_top_20 = int(pareto.nb_produits * 0.2)
+ca_top_20 = pareto.ca_top(nb_top_20)
+percentage_top_20 = (ca_top_20 / total_revenue) * 100 if total_revenue else 0
 
-st.info(f"**Règle des 80/20:** Les {len(top_20_percent)} produits du top 20% génèrent {percentage_top_20:.1f}% du CA total")
+st.info(f"**Règle des 80/20:** Les {nb_top_20} produits du top 20% génèrent {percentage_top_20:.1f}% du CA total "
+        f"— {pareto.nb_produits_pour(0.8)} produits suffisent pour atteindre 80% du CA")
 
 # === 9. ANALYSE DES ANNULATIONS PAR PAYS ===
 st.header("🚫 Analyse des Annulations par Pays")
 
 if not annulation.empty:
     # Nombre d'annulations par pays
-    annulations_par_pays = (annulation.groupby("Country")["InvoiceNo"]
+    annulations_par_pays = (annulation.groupby("Country", observed=True)["InvoiceNo"]
                                       .nunique()
                                       .sort_values(ascending=False)
                                       .reset_index()
@@ -329,12 +449,17 @@ st.header("📅 Analyse Temporelle")
 # === 10.1 MOIS LES PLUS FRUCTUEUX ===
 st.subheader("💰 Mois les Plus Fructueux")
 
-# Analyse par mois avec CA et nombre de commandes
-mois_fructueux = ventes.groupby(['Year', 'Month', 'Month_Name']).agg({
-    'Revenue': 'sum',
-    'InvoiceNo': 'nunique',
-    'CustomerID': 'nunique'
-}).reset_index()
+# Un seul passage sur les ventes filtrées, indexé par (année, mois, jour, heure) :
+# sert les mois fructueux, les statistiques temporelles et la saisonnalité
+agregats_temps = load_service_temporel().agregats(cle_filtres, ventes, compter_clients=not comptes_approches)
+
+# Analyse par mois avec CA et nombre de commandes (libellés ajoutés à l'affichage)
+mois_fructueux = agregats_temps.par_mois()
+mois_fructueux['Month_Name'] = libelles_mois(mois_fructueux['Month'])
+if comptes_approches:
+    # Clients distincts par mois estimés, comme le KPI Clients
+    mois_fructueux = mois_fructueux.drop(columns='CustomerID').merge(
+        clients_approches_par_mois(cube, start_date, end_date, selected_countries), on=['Year', 'Month'])
 
 mois_fructueux = mois_fructueux.sort_values('Revenue', ascending=False)
 mois_fructueux['Mois_Annee'] = mois_fructueux['Month_Name'] + ' ' + mois_fructueux['Year'].astype(str)
@@ -398,30 +523,13 @@ with st.expander("📋 Voir le détail complet des mois"):
 st.subheader("📈 Évolution Temporelle")
 
 # Sélection de la période
-periode = st.radio("Période d'analyse:", ["Hebdomadaire", "Mensuel", "Trimestriel", "Annuel"], horizontal=True)
-
-# Préparation des données
-df_temporel = ventes.set_index("InvoiceDate")
+periode = st.radio("Période d'analyse:", list(PERIODES), horizontal=True)
 
-if periode == "Hebdomadaire":
-    data_temporelle = df_temporel["Revenue"].resample("W").sum()
-    data_commandes = df_temporel["InvoiceNo"].resample("W").nunique()
-    title_periode = "Hebdomadaire"
-    
-elif periode == "Mensuel":
-    data_temporelle = df_temporel["Revenue"].resample("M").sum()
-    data_commandes = df_temporel["InvoiceNo"].resample("M").nunique()
-    title_periode = "Mensuel"
-    
-elif periode == "Trimestriel":
-    data_temporelle = df_temporel["Revenue"].resample("Q").sum()
-    data_commandes = df_temporel["InvoiceNo"].resample("Q").nunique()
-    title_periode = "Trimestriel"
-    
-else:
-    data_temporelle = df_temporel["Revenue"].resample("Y").sum()
-    data_commandes = df_temporel["InvoiceNo"].resample("Y").nunique()
-    title_periode = "Annuel"
+# Série cumulée à partir du grain (jour x pays) du cube filtré, sans relire les ventes
+serie_temporelle = serie_par_periode(cube_filtered.jours, periode).set_index("Date")
+data_temporelle = serie_temporelle["Revenue"]
+data_commandes = serie_temporelle["Commandes"]
+title_periode = periode
 
 # Graphique d'évolution
 fig_evolution = go.Figure()
@@ -485,71 +593,49 @@ col1, col2 = st.columns(2)
 
 with col1:
     # Par jour de la semaine
-    daily_revenue = ventes.groupby('DayOfWeek')['Revenue'].sum().reindex([
-        'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'
-    ])
-    fig_daily = px.bar(daily_revenue.reset_index(), x='DayOfWeek', y='Revenue', 
+    daily_revenue = agregats_temps.par_jour_semaine()
+    daily_revenue['DayOfWeek'] = libelles_jours(daily_revenue['DayOfWeek'])
+    fig_daily = px.bar(daily_revenue, x='DayOfWeek', y='Revenue', 
                        title="CA par jour de la semaine",
                        color_discrete_sequence=[COLOR_SEQ[0]])
     st.plotly_chart(fig_daily, use_container_width=True)
 
 with col2:
     # Par mois (moyenne sur toutes les années)
-    ca_par_mois = ventes.groupby('Month_Name')['Revenue'].sum().reset_index()
-    # Réordonner les mois
-    order_mois = ['January', 'February', 'March', 'April', 'May', 'June', 
-                 'July', 'August', 'September', 'October', 'November', 'December']
-    ca_par_mois['Month_Name'] = pd.Categorical(ca_par_mois['Month_Name'], categories=order_mois, ordered=True)
-    ca_par_mois = ca_par_mois.sort_values('Month_Name')
+    # Numéros de mois déjà ordonnés, libellés ajoutés à l'affichage
+    ca_par_mois = agregats_temps.par_mois_calendaire()
+    ca_par_mois['Month_Name'] = libelles_mois(ca_par_mois['Month'])
     
     fig_mois = px.bar(ca_par_mois, x='Month_Name', y='Revenue',
                      title="CA par mois (toutes années confondues)",
                      color_discrete_sequence=[COLOR_SEQ[1]])
     st.plotly_chart(fig_mois, use_container_width=True)
 
+# Jour de la semaine x heure : somme des tranches (jours, pays) de la grille horaire du cube
+mesure_horaire = st.radio("Mesure :", ["CA", "Commandes"], horizontal=True, key="mesure_horaire")
+revenus_horaires, commandes_horaires = cube.heures.semaine_heures(start_date, end_date, selected_countries)
+fig_horaire = px.imshow(
+    revenus_horaires if mesure_horaire == "CA" else commandes_horaires,
+    x=[f"{h}h" for h in range(24)], y=list(libelles_jours(np.arange(7))),
+    labels=dict(x="Heure", y="Jour", color=mesure_horaire),
+    title=f"{mesure_horaire} par jour de la semaine et par heure",
+    color_continuous_scale=COLOR_SCALE, aspect="auto",
+)
+st.plotly_chart(fig_horaire, use_container_width=True)
+
 # === 12. ANALYSE RFM ===
 st.header("👑 Analyse RFM (Récence-Fréquence-Monétaire) des Clients")
 
 try:
-    snapshot_date = ventes["InvoiceDate"].max() + pd.DateOffset(days=1)
-    
-    rfm_df = ventes.groupby("CustomerID").agg({
-        "InvoiceDate": lambda x: (snapshot_date - x.max()).days,
-        "InvoiceNo": "nunique",
-        "Revenue": "sum"
-    }).rename(columns={
-        "InvoiceDate": "Recency", 
-        "InvoiceNo": "Frequency", 
-        "Revenue": "Monetary"
-    })
+    # Toute la période et tous les pays : lecture de l'état incrémental, sinon
+    # scores et segments calculés une fois par état de filtre (période, pays)
+    if (start_date, end_date) == (min_date.date(), max_date.date()) and selected_countries == all_countries:
+        rfm_df = load_etat_rfm(version_donnees).scores()
+        st.caption("Scores issus de l'état RFM incrémental")
+    else:
+        rfm_df = load_service_rfm().rfm(cle_filtres, ventes)
     
-    if len(rfm_df) >= 4:
-        rfm_df['R_Score'] = pd.qcut(rfm_df['Recency'], 4, labels=range(4, 0, -1), duplicates='drop')
-        rfm_df['F_Score'] = pd.qcut(rfm_df['Frequency'].rank(method='first'), 4, labels=range(1, 5), duplicates='drop')
-        rfm_df['M_Score'] = pd.qcut(rfm_df['Monetary'], 4, labels=range(1, 5), duplicates='drop')
-        
-        rfm_df['R_Score'] = pd.to_numeric(rfm_df['R_Score'], errors='coerce')
-        rfm_df['F_Score'] = pd.to_numeric(rfm_df['F_Score'], errors='coerce')
-        rfm_df['M_Score'] = pd.to_numeric(rfm_df['M_Score'], errors='coerce')
-        
-        rfm_df['RFM_Score'] = rfm_df['R_Score'] + rfm_df['F_Score'] + rfm_df['M_Score']
-        
-        def segment_rfm(score):
-            if pd.isna(score):
-                return "Non classé"
-            elif score >= 10:
-                return "Champions"
-            elif score >= 8:
-                return "Clients Fidèles"
-            elif score >= 6:
-                return "Clients Prometteurs"
-            elif score >= 4:
-                return "Clients à Risque"
-            else:
-                return "Clients à Perdre"
-        
-        rfm_df['Segment'] = rfm_df['RFM_Score'].apply(segment_rfm)
-        
+    if 'Segment' in rfm_df.columns:
         segment_counts = rfm_df['Segment'].value_counts().reset_index()
         fig_rfm = px.pie(segment_counts, values='count', names='Segment', 
                          title="Répartition des Segments Clients RFM",